@@ -0,0 +1,55 @@
+"""
+Measures the time taken to construct a DependencyGraph from synthetic
+repositories of increasing size.
+
+Usage: poetry run python benchmarks/graph_benchmark.py [SIZE ...]
+"""
+import random
+import sys
+import time
+from typing import List
+
+from poetry.core.packages.dependency import Dependency
+from poetry.core.packages.package import Package
+from poetry.repositories import Repository
+
+from poetry_workspace.graph import DependencyGraph
+
+DEFAULT_SIZES = [1_000, 5_000, 20_000]
+
+# Packages are arranged in layers, with each package depending on a few random
+# packages in the next layer, which resembles the shape of real lock files.
+LAYERS = 10
+FANOUT = 4
+
+
+def build_repo(size: int, seed: int = 0) -> Repository:
+    rng = random.Random(seed)
+    width = max(1, size // LAYERS)
+    layers: List[List[Package]] = []
+
+    for layer in range(LAYERS):
+        layers.append([Package(f"pkg-{layer}-{i}", "1.0.0") for i in range(width)])
+
+    for layer, packages in enumerate(layers[:-1]):
+        for package in packages:
+            for dep in rng.sample(layers[layer + 1], min(FANOUT, width)):
+                package.add_dependency(Dependency(dep.name, "*"))
+
+    return Repository([package for packages in layers for package in packages])
+
+
+def main(sizes: List[int]) -> None:
+    for size in sizes:
+        repo = build_repo(size)
+        edges = sum(len(package.requires) for package in repo.packages)
+
+        start = time.perf_counter()
+        graph = DependencyGraph(repo, [])
+        elapsed = time.perf_counter() - start
+
+        print(f"{len(graph):>7} packages {edges:>7} edges: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,89 @@
+"""
+Measures the time taken by the git and native VCS backends to list changed
+files and read files, in synthetic repositories of increasing size.
+
+Usage: poetry run python benchmarks/vcs_benchmark.py [SIZE ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from cleo.io.null_io import NullIO
+
+from poetry_workspace.vcs.git import Git
+from poetry_workspace.vcs.native import NativeGit
+
+DEFAULT_SIZES = [1_000, 5_000, 20_000]
+
+# Files are spread over projects like in a workspace, and a few projects are
+# changed in every commit.
+FILES_PER_PROJECT = 50
+COMMITS = 20
+CHANGED_PROJECTS = 3
+
+_GIT_ENV = {
+    **os.environ,
+    "GIT_AUTHOR_NAME": "bench",
+    "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "bench",
+    "GIT_COMMITTER_EMAIL": "bench@example.com",
+}
+
+
+def git(root: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=root, env=_GIT_ENV, check=True, stdout=subprocess.DEVNULL)
+
+
+def build_repo(root: Path, size: int) -> List[Path]:
+    git(root, "init", "-q")
+    git(root, "config", "gc.auto", "0")
+    files = [Path("projects", f"project-{i // FILES_PER_PROJECT}", "src", f"module_{i}.py") for i in range(size)]
+    for file in files:
+        (root / file).parent.mkdir(parents=True, exist_ok=True)
+        (root / file).write_text(f"VALUE = {file.stem!r}\n" * 20)
+    git(root, "add", ".")
+    git(root, "commit", "-q", "-m", "initial")
+
+    projects = max(1, size // FILES_PER_PROJECT)
+    for commit in range(COMMITS):
+        for project in range(CHANGED_PROJECTS):
+            file = files[((commit * CHANGED_PROJECTS + project) % projects) * FILES_PER_PROJECT]
+            (root / file).write_text(f"VALUE = {commit}\n")
+        git(root, "commit", "-q", "-a", "-m", f"commit {commit}")
+
+    git(root, "repack", "-adq")
+    (root / files[-1]).write_text("VALUE = 'modified'\n")
+    return files
+
+
+def measure(run: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def main(sizes: List[int]) -> None:
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir).resolve()
+            files = build_repo(root, size)
+            read = files[:: max(1, len(files) // 100)]
+
+            for name, vcs in [("git", Git(root, NullIO())), ("native", NativeGit(root, NullIO()))]:
+                working_tree = measure(lambda: vcs.get_changed_files(f"HEAD~{COMMITS}"))
+                commit_range = measure(lambda: vcs.get_changed_files(f"HEAD~{COMMITS}...HEAD"))
+                read_files = measure(lambda: vcs.read_files(f"HEAD~{COMMITS // 2}", read))
+                vcs.close()
+
+                print(
+                    f"{size:>7} files {name:>6}: working tree {working_tree:.3f}s "
+                    f"range {commit_range:.3f}s read {len(read)} files {read_files:.3f}s"
+                )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
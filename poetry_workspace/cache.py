@@ -0,0 +1,382 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from cleo.io.io import IO
+
+CACHE_DIR_NAME = ".poetry-workspace"
+
+# Bump whenever the layout of the cached data changes so that stale cache
+# files written by older versions of the plugin are discarded.
+CACHE_VERSION = 2
+
+# Default limit on the total size of the results cached by `workspace run --cache`.
+RUN_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+# Default limit on the number of commit pairs whose changes are cached for `--since`.
+DIFF_CACHE_MAX_ENTRIES = 64
+
+
+class ProjectEntries:
+    """
+    Entries for workspace projects stored in a cache file, keyed by the project's
+    pyproject.toml path relative to the workspace root. The file is only read
+    once an entry is first accessed.
+    """
+
+    _root: Path
+    _file: Path
+    _entries: Optional[Dict[str, Dict[str, Any]]]
+
+    def __init__(self, root: Path, file: Path):
+        self._root = root
+        self._file = file
+        self._entries = None
+
+    def get(self, pyproject_path: Path) -> Optional[Dict[str, Any]]:
+        return self._get_entries().get(self._key(pyproject_path))
+
+    def set(self, pyproject_path: Path, entry: Dict[str, Any]) -> None:
+        self._get_entries()[self._key(pyproject_path)] = entry
+
+    def retain(self, pyproject_paths: List[Path]) -> bool:
+        """Drops the entries of all other projects, and returns whether any were dropped."""
+        entries = self._get_entries()
+        keys = {self._key(path) for path in pyproject_paths}
+        stale = [key for key in entries if key not in keys]
+        for key in stale:
+            del entries[key]
+        return bool(stale)
+
+    def save(self) -> None:
+        write_cache_file(self._root, self._file, {"version": CACHE_VERSION, "projects": self._get_entries()})
+
+    def _get_entries(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            entries: Dict[str, Dict[str, Any]] = {}
+            try:
+                content = json.loads(self._file.read_text())
+            except (OSError, ValueError):
+                content = None
+
+            if isinstance(content, dict) and content.get("version") == CACHE_VERSION:
+                entries = content.get("projects", {})
+            self._entries = entries
+        return self._entries
+
+    def _key(self, pyproject_path: Path) -> str:
+        return Path(os.path.relpath(pyproject_path, self._root)).as_posix()
+
+
+class WorkspaceCache:
+    """
+    On-disk cache of data derived from the workspace's files, stored in the
+    workspace root directory.
+
+    Parsed project configurations are keyed by the project's pyproject.toml path
+    relative to the workspace root, and are only considered valid while the file's
+    modification time and size are unchanged. The dependency graph snapshot is
+    keyed by a hash of its inputs computed by the workspace.
+    """
+
+    _root: Path
+    _io: "IO"
+    _projects: ProjectEntries
+    _dirty: bool
+
+    def __init__(self, root: Path, io: "IO"):
+        self._root = root
+        self._io = io
+        self._projects = ProjectEntries(root, self.projects_file)
+        self._dirty = False
+
+    @property
+    def path(self) -> Path:
+        return self._root / CACHE_DIR_NAME
+
+    @property
+    def projects_file(self) -> Path:
+        return self.path / "projects.json"
+
+    @property
+    def graph_file(self) -> Path:
+        return self.path / "graph.json"
+
+    def get_project_config(self, pyproject_path: Path) -> Optional[Dict[str, Any]]:
+        entry = self._projects.get(pyproject_path)
+        if entry is None:
+            return None
+
+        try:
+            stat = pyproject_path.stat()
+        except OSError:
+            return None
+
+        if entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            return None
+        return entry["config"]
+
+    def set_project_config(self, pyproject_path: Path, config: Dict[str, Any]) -> None:
+        stat = pyproject_path.stat()
+        self._projects.set(pyproject_path, {"mtime": stat.st_mtime_ns, "size": stat.st_size, "config": config})
+        self._dirty = True
+
+    def retain_projects(self, pyproject_paths: List[Path]) -> None:
+        """Drops entries for projects that are no longer part of the workspace."""
+        if self._projects.retain(pyproject_paths):
+            self._dirty = True
+
+    def get_graph_snapshot(self, key: str) -> Optional[Dict[str, Any]]:
+        content = self._read(self.graph_file)
+        if content is None or content.get("key") != key:
+            return None
+        return content["graph"]
+
+    def set_graph_snapshot(self, key: str, snapshot: Dict[str, Any]) -> None:
+        self._write(self.graph_file, {"key": key, "graph": snapshot})
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+
+        try:
+            self._projects.save()
+        except OSError as e:
+            if self._io.is_debug():
+                self._io.write_line(f"Unable to write workspace cache {self.projects_file}: {e}")
+            return
+
+        self._dirty = False
+
+    def _read(self, file: Path) -> Optional[Dict[str, Any]]:
+        try:
+            content = json.loads(file.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(content, dict) or content.get("version") != CACHE_VERSION:
+            return None
+        return content
+
+    def _write(self, file: Path, content: Dict[str, Any]) -> bool:
+        try:
+            write_cache_file(self._root, file, {"version": CACHE_VERSION, **content})
+        except OSError as e:
+            if self._io.is_debug():
+                self._io.write_line(f"Unable to write workspace cache {file}: {e}")
+            return False
+
+        return True
+
+
+class RunCache:
+    """
+    On-disk cache of the results of commands run by `workspace run --cache`,
+    stored in the workspace's cache directory. Results are keyed by a hash of
+    everything that the command's result depends on, computed by the caller.
+
+    The cache is bounded by the total size of its entries, and the least
+    recently used entries are evicted first when it grows beyond `max_size`.
+    """
+
+    _root: Path
+    _io: "IO"
+    _max_size: int
+
+    def __init__(self, root: Path, io: "IO", max_size: int = RUN_CACHE_MAX_SIZE):
+        self._root = root
+        self._io = io
+        self._max_size = max_size
+
+    @property
+    def path(self) -> Path:
+        return self._root / CACHE_DIR_NAME / "run"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        file = self.path / f"{key}.json"
+        try:
+            content = json.loads(file.read_text())
+            # Entries are evicted by modification time, so mark this one as
+            # recently used.
+            os.utime(file)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(content, dict) or content.get("version") != CACHE_VERSION:
+            return None
+        return content
+
+    def set(self, key: str, exit_code: int, output: List[str]) -> None:
+        content = {"version": CACHE_VERSION, "exit_code": exit_code, "output": output}
+        try:
+            write_cache_file(self._root, self.path / f"{key}.json", content)
+        except OSError as e:
+            if self._io.is_debug():
+                self._io.write_line(f"Unable to write run cache entry {key}: {e}")
+
+    def prune(self) -> None:
+        """Evicts the least recently used entries until the cache fits in `max_size`."""
+        try:
+            entries = [(entry.stat(), entry) for entry in self.path.glob("*.json")]
+        except OSError:
+            return
+
+        size = sum(stat.st_size for stat, _ in entries)
+        for stat, entry in sorted(entries, key=lambda item: item[0].st_mtime_ns):
+            if size <= self._max_size:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            size -= stat.st_size
+
+
+class DiffCache:
+    """
+    On-disk cache of the changes between pairs of commits selected by `--since`
+    with a `base...head` range. Commits never change, so the files changed
+    between them are cached indefinitely. Changed projects also depend on the
+    workspace's current project layout, so they're keyed by a hash of it
+    computed by the caller.
+
+    Only the most recently used `max_entries` commit pairs are kept.
+    """
+
+    _root: Path
+    _io: "IO"
+    _max_entries: int
+
+    def __init__(self, root: Path, io: "IO", max_entries: int = DIFF_CACHE_MAX_ENTRIES):
+        self._root = root
+        self._io = io
+        self._max_entries = max_entries
+
+    @property
+    def path(self) -> Path:
+        return self._root / CACHE_DIR_NAME / "diff"
+
+    def get_files(self, base: str, head: str) -> Optional[List[str]]:
+        content = self._read(base, head)
+        return content["files"] if content else None
+
+    def get_projects(self, base: str, head: str, layout: str) -> Optional[List[str]]:
+        content = self._read(base, head)
+        return content["projects"].get(layout) if content else None
+
+    def set_files(self, base: str, head: str, files: List[str]) -> None:
+        self._write(base, head, {"files": files, "projects": {}})
+
+    def set_projects(self, base: str, head: str, layout: str, projects: List[str]) -> None:
+        content = self._read(base, head)
+        if content is None:
+            return
+
+        # Only keep projects for the latest layout, it rarely changes between
+        # runs for the same commits.
+        content["projects"] = {layout: projects}
+        self._write(base, head, content)
+
+    def prune(self) -> None:
+        """Evicts the least recently used entries until at most `max_entries` are left."""
+        try:
+            entries = sorted(self.path.glob("*.json"), key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+        except OSError:
+            return
+
+        for entry in entries[self._max_entries :]:
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+
+    def _file(self, base: str, head: str) -> Path:
+        return self.path / f"{base}-{head}.json"
+
+    def _read(self, base: str, head: str) -> Optional[Dict[str, Any]]:
+        file = self._file(base, head)
+        try:
+            content = json.loads(file.read_text())
+            # Entries are evicted by modification time, so mark this one as
+            # recently used.
+            os.utime(file)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(content, dict) or content.get("version") != CACHE_VERSION:
+            return None
+        return content
+
+    def _write(self, base: str, head: str, content: Dict[str, Any]) -> None:
+        try:
+            write_cache_file(self._root, self._file(base, head), {**content, "version": CACHE_VERSION})
+        except OSError as e:
+            if self._io.is_debug():
+                self._io.write_line(f"Unable to write diff cache entry {base}...{head}: {e}")
+
+
+class BuildManifest:
+    """
+    Records the inputs and artifacts of each project built by `workspace build
+    --incremental`, so that projects whose artifacts are up to date can be
+    skipped. Entries are keyed by the project's pyproject.toml path relative to
+    the workspace root, and artifact paths are relative to the project's root.
+    """
+
+    _root: Path
+    _io: "IO"
+    _projects: ProjectEntries
+
+    def __init__(self, root: Path, io: "IO"):
+        self._root = root
+        self._io = io
+        self._projects = ProjectEntries(root, self.file)
+
+    @property
+    def file(self) -> Path:
+        return self._root / CACHE_DIR_NAME / "build.json"
+
+    def is_up_to_date(self, pyproject_path: Path, build_hash: str, version: str) -> bool:
+        entry = self._projects.get(pyproject_path)
+        if entry is None or entry["hash"] != build_hash or entry["version"] != version:
+            return False
+        return all((pyproject_path.parent / artifact).exists() for artifact in entry["artifacts"])
+
+    def set(self, pyproject_path: Path, build_hash: str, version: str, artifacts: List[Path]) -> None:
+        self._projects.set(
+            pyproject_path,
+            {
+                "hash": build_hash,
+                "version": version,
+                "artifacts": [Path(os.path.relpath(path, pyproject_path.parent)).as_posix() for path in artifacts],
+            },
+        )
+
+    def save(self) -> None:
+        try:
+            self._projects.save()
+        except OSError as e:
+            if self._io.is_debug():
+                self._io.write_line(f"Unable to write build manifest {self.file}: {e}")
+
+
+def write_cache_file(root: Path, file: Path, content: Dict[str, Any]) -> None:
+    """
+    Writes a JSON file in the workspace's cache directory, creating the directory
+    if needed. The directory is ignored by VCS so that it's never committed.
+    """
+    cache_dir = root / CACHE_DIR_NAME
+    cache_dir.mkdir(exist_ok=True)
+    gitignore = cache_dir / ".gitignore"
+    if not gitignore.exists():
+        gitignore.write_text("# Automatically created by poetry-workspace-plugin.\n*\n")
+    file.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first so that concurrent Poetry processes never
+    # observe a partially written cache file.
+    temp_file = file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    temp_file.write_text(json.dumps(content))
+    os.replace(str(temp_file), str(file))
@@ -1,41 +1,120 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
 from poetry.console.commands.build import BuildCommand as BaseBuildCommand
 
+if TYPE_CHECKING:
+    from cleo.io.io import IO
+    from poetry.core.packages.directory_dependency import DirectoryDependency
+    from poetry.core.packages.project_package import ProjectPackage
+
+    from poetry_workspace.workspace import Workspace
+
 
 class BuildCommand(BaseBuildCommand):
+    _pinned_versions: Optional[Dict[str, str]]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._pinned_versions = None
+
+    def set_pinned_versions(self, versions: Dict[str, str]) -> None:
+        """
+        Sets the versions to pin path dependencies to by name, instead of reading
+        them from each dependency's pyproject.toml file.
+        """
+        self._pinned_versions = versions
+
     def handle(self) -> int:
-        from poetry.core.packages.dependency import Dependency
+        versions = self._pinned_versions
+        if versions is None:
+            versions = PathDependencyVersions(self.io).resolve(self.poetry.package)
+
+        pin_path_dependencies(self.poetry.package, versions)
+        return super().handle() or 0
+
+
+class PathDependencyVersions:
+    """
+    Resolves the versions that path dependencies are pinned to when building.
+    Each dependency's version is only looked up once, from the workspace's
+    already loaded project configurations if possible, otherwise from the
+    dependency's pyproject.toml file.
+    """
+
+    _io: "IO"
+    _workspace: Optional["Workspace"]
+    _workspace_configs: Optional[Dict[Path, Dict[str, Any]]]
+    _versions: Dict[Path, str]
+
+    def __init__(self, io: "IO", workspace: Optional["Workspace"] = None):
+        self._io = io
+        self._workspace = workspace
+        self._workspace_configs = None
+        self._versions = {}
+
+    def get(self, dep: "DirectoryDependency") -> str:
+        path = dep.full_path.resolve()
+        if path not in self._versions:
+            self._versions[path] = self._read_version(path)
+        return self._versions[path]
+
+    def resolve(self, package: "ProjectPackage") -> Dict[str, str]:
+        """Returns the versions of a package's path dependencies by name."""
         from poetry.core.packages.directory_dependency import DirectoryDependency
+
+        return {dep.name: self.get(dep) for dep in package.requires if isinstance(dep, DirectoryDependency)}
+
+    def _read_version(self, path: Path) -> str:
         from poetry.core.pyproject.toml import PyProjectTOML
 
-        # Replace directory dependencies specified by a path with one specified
-        # by a version constraint.
-        for i, dep in enumerate(self.poetry.package.requires):
-            if not isinstance(dep, DirectoryDependency):
-                continue
-
-            pyproject_toml = PyProjectTOML(dep.full_path / "pyproject.toml")
-            if pyproject_toml.is_poetry_project():
-                version = pyproject_toml.poetry_config.get("version")
-                if not version:
-                    self.io.write_line(
-                        f"<warning>No version property in project {dep.full_path}, using version '*'</warning>"
-                    )
-                    version = "*"
-            else:
-                self.io.write_line(f"<warning>Not a Poetry project {dep.full_path}, using version '*'</warning>")
-                version = "*"
-
-            self.poetry.package.requires[i] = Dependency(
-                name=dep.name,
-                constraint=version,
-                optional=dep.is_optional(),
-                groups=list(dep.groups),
-                allows_prereleases=dep.allows_prereleases(),
-                extras=dep.extras,
-                source_type=dep.source_type,
-                source_url=dep.source_url,
-                source_reference=dep.source_reference,
-                source_resolved_reference=dep.source_resolved_reference,
-            )
+        config = self._get_workspace_config(path)
+        if config is None:
+            pyproject_toml = PyProjectTOML(path / "pyproject.toml")
+            if not pyproject_toml.is_poetry_project():
+                self._io.write_line(f"<warning>Not a Poetry project {path}, using version '*'</warning>")
+                return "*"
+            config = pyproject_toml.poetry_config
 
-        return super().handle() or 0
+        version = config.get("version")
+        if not version:
+            self._io.write_line(f"<warning>No version property in project {path}, using version '*'</warning>")
+            return "*"
+
+        return version
+
+    def _get_workspace_config(self, path: Path) -> Optional[Dict[str, Any]]:
+        if self._workspace is None:
+            return None
+
+        if self._workspace_configs is None:
+            self._workspace_configs = {
+                project.root_dir.resolve(): project.config for project in self._workspace.projects
+            }
+        return self._workspace_configs.get(path)
+
+
+def pin_path_dependencies(package: "ProjectPackage", versions: Dict[str, str]) -> None:
+    """
+    Replaces a package's directory dependencies specified by a path with ones
+    specified by the given versions.
+    """
+    from poetry.core.packages.dependency import Dependency
+    from poetry.core.packages.directory_dependency import DirectoryDependency
+
+    for i, dep in enumerate(package.requires):
+        if not isinstance(dep, DirectoryDependency):
+            continue
+
+        package.requires[i] = Dependency(
+            name=dep.name,
+            constraint=versions.get(dep.name, "*"),
+            optional=dep.is_optional(),
+            groups=list(dep.groups),
+            allows_prereleases=dep.allows_prereleases(),
+            extras=dep.extras,
+            source_type=dep.source_type,
+            source_url=dep.source_url,
+            source_reference=dep.source_reference,
+            source_resolved_reference=dep.source_resolved_reference,
+        )
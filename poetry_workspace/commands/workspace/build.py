@@ -1,24 +1,253 @@
-from typing import TYPE_CHECKING
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from poetry.console.commands.build import BuildCommand
+from cleo.helpers import option
 from poetry.console.commands.env_command import EnvCommand
 
+from poetry_workspace.cache import BuildManifest
+from poetry_workspace.commands.build import BuildCommand, PathDependencyVersions
 from poetry_workspace.commands.workspace.workspace import WorkspaceCommand
+from poetry_workspace.hashing import hash_build_inputs
+from poetry_workspace.scheduler import parse_jobs
 
 if TYPE_CHECKING:
     from cleo.io.io import IO
+    from cleo.io.outputs.output import Verbosity
     from poetry.poetry import Poetry
+    from poetry.utils.env import Env
 
 
 class WorkspaceBuildCommand(WorkspaceCommand, EnvCommand):
     name = "workspace build"
     description = "Builds workspace projects."
 
-    options = BuildCommand.options + WorkspaceCommand.options
+    options = (
+        BuildCommand.options
+        + [
+            option("jobs", "j", "Build up to this many projects at once, each in its own process.", flag=False),
+            option(
+                "incremental",
+                None,
+                "Skip projects whose artifacts were built from the same sources, version and path dependency versions.",
+            ),
+        ]
+        + WorkspaceCommand.options
+    )
     loggers = BuildCommand.loggers
 
+    def __init__(self):
+        super().__init__()
+
+        # Sibling projects' versions are looked up once for all selected projects.
+        self._path_versions: Optional[PathDependencyVersions] = None
+        self._pinned_versions: Dict[Path, Dict[str, str]] = {}
+
+        # Used in parallel mode, the pyproject.toml file and output of each project
+        # to build in the order the projects were selected.
+        self._pending: Dict[str, Tuple[Path, "IO"]] = {}
+        self._jobs: Optional[int] = None
+
+        # Used in incremental mode.
+        self._manifest: Optional[BuildManifest] = None
+        self._build_hashes: Dict[Path, str] = {}
+        self._versions: Dict[Path, str] = {}
+
+    def pre_handle(self) -> int:
+        self._path_versions = PathDependencyVersions(self.io, self.workspace)
+
+        if self.option("jobs") is not None:
+            try:
+                self._jobs = parse_jobs(self.option("jobs"))
+            except ValueError as e:
+                self.line(str(e), style="error")
+                return 1
+
+        if self.option("incremental"):
+            self._manifest = BuildManifest(self.workspace.root_dir, self.io)
+
+        return 0
+
     def handle_each(self, poetry: "Poetry", io: "IO") -> int:
+        assert self._path_versions is not None
+        file_path = poetry.file.path
+        pinned_versions = self._path_versions.resolve(poetry.package)
+        self._pinned_versions[file_path] = pinned_versions
+
+        if self._manifest:
+            build_hash = hash_build_inputs(poetry, self.option("format") or "all", pinned_versions)
+            version = poetry.package.version.text
+            if self._manifest.is_up_to_date(file_path, build_hash, version):
+                io.write_line(f"Skipping <c1>{poetry.package.pretty_name}</c1> (<c2>{version}</c2>), up to date")
+                return 0
+
+            self._build_hashes[file_path] = build_hash
+            self._versions[file_path] = version
+
+        if self._jobs is not None:
+            self._pending[poetry.package.name] = (file_path, io)
+            return 0
+
         cmd = BuildCommand()
         cmd.set_env(self.env)
         cmd.set_poetry(poetry)
-        return cmd.execute(io)
+        cmd.set_pinned_versions(pinned_versions)
+
+        dist_dir = poetry.file.parent / "dist"
+        before = dist_mtimes(dist_dir)
+        exit_code = cmd.execute(io)
+        if not exit_code:
+            after = dist_mtimes(dist_dir)
+            self._record(file_path, [path for path, mtime in after.items() if before.get(path) != mtime])
+            # Save after each project, so that projects built before a failure
+            # are skipped next time.
+            self._save_manifest()
+
+        return exit_code
+
+    def post_handle(self) -> int:
+        if self._jobs is None:
+            return 0
+
+        artifacts: List[Path] = []
+        failed: List[str] = []
+        exit_code = 0
+
+        # Path dependencies are pinned to versions when building, so projects can
+        # be built in any order.
+        names = list(self._pending)
+        pending = list(self._pending.values())
+        builds = [
+            (file_path, self.env, self.option("format"), io.output.verbosity, self._pinned_versions[file_path])
+            for file_path, io in pending
+        ]
+        try:
+            for index, (project_exit_code, output, built) in build_in_parallel(self._jobs, build_project, builds):
+                # Write each project's log in one go, as projects are built
+                # concurrently.
+                file_path, io = pending[index]
+                if output:
+                    io.write_line(output.rstrip("\n"))
+                artifacts.extend(built)
+                if not project_exit_code:
+                    self._record(file_path, built)
+                    continue
+
+                failed.append(names[index])
+                if not exit_code:
+                    exit_code = project_exit_code
+        finally:
+            # Save once all builds have finished, including the projects built
+            # before a failure so that they're skipped next time.
+            self._save_manifest()
+
+        if artifacts:
+            self.line("")
+            self.line(f"Built {len(artifacts)} artifacts:")
+            for artifact in sorted(artifacts):
+                self.line(f"  - {os.path.relpath(artifact, self.workspace.root_dir)}")
+
+        if failed:
+            self.line("")
+            self.line(f"{len(failed)} of {len(names)} projects failed to build: {', '.join(failed)}", style="error")
+
+        return exit_code
+
+    def _record(self, file_path: Path, artifacts: List[Path]) -> None:
+        if self._manifest:
+            self._manifest.set(file_path, self._build_hashes[file_path], self._versions[file_path], artifacts)
+
+    def _save_manifest(self) -> None:
+        if self._manifest:
+            self._manifest.save()
+
+
+def build_in_parallel(
+    jobs: int, build: Callable[..., Tuple[int, str, List[Path]]], builds: Sequence[Tuple[Any, ...]]
+) -> Iterator[Tuple[int, Tuple[int, str, List[Path]]]]:
+    """
+    Runs builds in up to `jobs` worker processes, yielding the index and result
+    of each build as soon as it finishes. Once a build fails, the builds that
+    haven't started yet are cancelled.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = {executor.submit(build, *args): index for index, args in enumerate(builds)}
+        failed = False
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                if future.cancelled():
+                    continue
+
+                result = future.result()
+                yield index, result
+                if result[0] and not failed:
+                    failed = True
+                    for other in pending:
+                        other.cancel()
+
+
+def build_project(
+    file_path: Path,
+    env: "Env",
+    fmt: Optional[str],
+    verbosity: "Verbosity",
+    pinned_versions: Optional[Dict[str, str]] = None,
+) -> Tuple[int, str, List[Path]]:
+    """
+    Builds a project in a worker process, pinning its path dependencies to the
+    given versions if any. Returns the build command's exit code, its output,
+    and the artifacts that were written to the project's dist directory.
+    """
+    import logging
+
+    from cleo.io.buffered_io import BufferedIO
+    from cleo.io.inputs.string_input import StringInput
+    from poetry.console.logging.io_formatter import IOFormatter
+    from poetry.console.logging.io_handler import IOHandler
+    from poetry.factory import Factory
+
+    from poetry_workspace.formatter import RawFormatter
+
+    # Keep style tags in the output, it's formatted when written by the main
+    # process.
+    io = BufferedIO(StringInput(f"--format {fmt}" if fmt else ""))
+    io.output.set_formatter(RawFormatter())
+    io.set_verbosity(verbosity)
+
+    # Set up the builders' loggers the same way Poetry's application does for
+    # the command, but writing to the buffered output.
+    handler = IOHandler(io)
+    handler.setFormatter(IOFormatter())
+    for name in BuildCommand.loggers:
+        logger = logging.getLogger(name)
+        logger.handlers = [handler]
+        logger.setLevel(logging.DEBUG if io.is_debug() else logging.INFO)
+
+    dist_dir = file_path.parent / "dist"
+    before = dist_mtimes(dist_dir)
+
+    try:
+        cmd = BuildCommand()
+        cmd.set_env(env)
+        cmd.set_poetry(Factory().create_poetry(file_path))
+        if pinned_versions is not None:
+            cmd.set_pinned_versions(pinned_versions)
+        exit_code = cmd.run(io)
+    except Exception as e:
+        # Report the failure like a non-zero exit code, so that the main process
+        # stops building other projects.
+        io.write_line(f"<error>{type(e).__name__}: {e}</error>")
+        exit_code = 1
+
+    after = dist_mtimes(dist_dir)
+    built = sorted(path for path, mtime in after.items() if before.get(path) != mtime)
+    return exit_code, io.fetch_output(), built
+
+
+def dist_mtimes(dist_dir: Path) -> Dict[Path, int]:
+    if not dist_dir.is_dir():
+        return {}
+    return {path: path.stat().st_mtime_ns for path in dist_dir.iterdir()}
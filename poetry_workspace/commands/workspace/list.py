@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Dict, List
 
 from cleo.helpers import option
 
@@ -51,17 +51,38 @@ external to the workspace in the dependency list."""
             self.line("unknown output format", style="error")
             return 1
 
-        for project in self.selected_projects():
-            if self.output == "topological":
+        projects = self.selected_projects()
+        if self.output == "topological":
+            for project in projects:
                 self.line(project.name)
-                continue
+            return 0
 
-            def get_tree(package_name: str) -> dict:
+        # Dependency trees share many subtrees, so each package's tree is only
+        # built and rendered once.
+        trees: Dict[str, dict] = {}
+        rendered: Dict[str, List[str]] = {}
+
+        def get_tree(package_name: str) -> dict:
+            if package_name not in trees:
                 deps = self.workspace.graph.dependencies(package_name)
                 if not self.show_external:
                     deps = [dep for dep in deps if self.workspace.graph.is_project_package(dep)]
-                return {dep.name: get_tree(dep.name) for dep in deps}
-
+                trees[package_name] = {dep.name: get_tree(dep.name) for dep in deps}
+            return trees[package_name]
+
+        def render_tree(package_name: str) -> List[str]:
+            if package_name not in rendered:
+                lines = [package_name]
+                dep_names = list(get_tree(package_name))
+                for i, dep_name in enumerate(dep_names):
+                    is_last = i == len(dep_names) - 1
+                    dep_lines = render_tree(dep_name)
+                    lines.append(("└── " if is_last else "├── ") + dep_lines[0])
+                    lines.extend(("    " if is_last else "│   ") + line for line in dep_lines[1:])
+                rendered[package_name] = lines
+            return rendered[package_name]
+
+        for project in projects:
             self._project_tree[project.name] = get_tree(project.name)
 
         if self.output == "json":
@@ -69,29 +90,13 @@ external to the workspace in the dependency list."""
 
             self.line(json.dumps(self._project_tree, indent=2))
         elif self.output == "tree":
-            for project_name, tree in self._project_tree.items():
-                self.write_tree(project_name, tree, [])
+            for project_name in self._project_tree:
+                for line in render_tree(project_name):
+                    self.line(line)
                 self.line("")
 
         return 0
 
-    def write_tree(self, project_name: str, tree: dict, last_levels: List[bool]) -> None:
-        for i, is_last in enumerate(last_levels):
-            if i != len(last_levels) - 1:
-                if not is_last:
-                    self.io.write("│   ")
-                else:
-                    self.io.write("    ")
-            else:
-                if not is_last:
-                    self.io.write("├── ")
-                else:
-                    self.io.write("└── ")
-
-        self.line(project_name)
-        for i, (dep_name, dep_tree) in enumerate(tree.items()):
-            self.write_tree(dep_name, dep_tree, last_levels + [i == len(tree) - 1])
-
     def selected_projects(self, *args) -> List["Package"]:
         projects = super().selected_projects(self.show_external)
         if self.output in ("json", "tree"):
@@ -1,8 +1,13 @@
-from typing import TYPE_CHECKING, List
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
+from cleo.helpers import option
 from poetry.console.commands.publish import PublishCommand
 
 from poetry_workspace.commands.workspace.workspace import WorkspaceCommand
+from poetry_workspace.errors import PublishError
+from poetry_workspace.scheduler import parse_jobs
 
 if TYPE_CHECKING:
     from cleo.io.inputs.option import Option
@@ -20,9 +25,88 @@ class WorkspacePublishCommand(WorkspaceCommand):
     name = "workspace publish"
     description = "Publishes workspace projects."
 
-    options = strip_flag_shortcuts(PublishCommand.options) + WorkspaceCommand.options
+    options = (
+        strip_flag_shortcuts(PublishCommand.options)
+        + [
+            option(
+                "jobs",
+                "j",
+                "Upload up to this many files at once, reusing connections to the repository.",
+                flag=False,
+            ),
+            option("skip-existing", None, "Skip files that the repository already has instead of failing."),
+        ]
+        + WorkspaceCommand.options
+    )
+
+    def __init__(self):
+        super().__init__()
+
+        # Used in concurrent mode, the projects to publish once all of them have
+        # been selected.
+        self._pending: List[Tuple["Poetry", "IO"]] = []
+        self._jobs: Optional[int] = None
+
+    @property
+    def _concurrent(self) -> bool:
+        return self.option("jobs") is not None or self.option("skip-existing")
+
+    def pre_handle(self) -> int:
+        if not self._concurrent:
+            return 0
+
+        if self.option("build"):
+            self.line("The --build option can't be used with --jobs or --skip-existing", style="error")
+            return 1
+
+        try:
+            self._jobs = parse_jobs(self.option("jobs")) if self.option("jobs") is not None else 1
+        except ValueError as e:
+            self.line(str(e), style="error")
+            return 1
+
+        return 0
 
     def handle_each(self, poetry: "Poetry", io: "IO") -> int:
+        if self._jobs is not None:
+            self._pending.append((poetry, io))
+            return 0
+
         cmd = PublishCommand()
         cmd.set_poetry(poetry)
         return cmd.execute(io)
+
+    def post_handle(self) -> int:
+        from poetry_workspace.publisher import WorkspacePublisher
+
+        if self._jobs is None or not self._pending:
+            return 0
+
+        cert = self.option("cert")
+        client_cert = self.option("client-cert")
+        try:
+            publisher = WorkspacePublisher.for_repository(
+                self._pending[0][0],
+                self.io,
+                repository_name=self.option("repository"),
+                username=self.option("username"),
+                password=self.option("password"),
+                cert=Path(cert) if cert else None,
+                client_cert=Path(client_cert) if client_cert else None,
+                jobs=self._jobs,
+                skip_existing=self.option("skip-existing"),
+                dry_run=self.option("dry-run"),
+            )
+        except PublishError as e:
+            self.line(str(e), style="error")
+            return 1
+
+        try:
+            errors = publisher.publish(self._pending)
+        finally:
+            publisher.close()
+
+        for path, error in errors.items():
+            self.line(f"{os.path.relpath(path, self.workspace.root_dir)}: {error}", style="error")
+
+        return 1 if errors else 0
@@ -1,17 +1,29 @@
+import hashlib
+import json
 import os
 import subprocess
-from typing import TYPE_CHECKING, List, Tuple
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
 
 from cleo.helpers import option
+from cleo.io.outputs.output import Verbosity
 from poetry.console.commands.env_command import EnvCommand
 from poetry.console.commands.run import RunCommand
 
+from poetry_workspace.cache import RunCache
 from poetry_workspace.commands.workspace.workspace import WorkspaceCommand
+from poetry_workspace.hashing import ProjectHasher
+from poetry_workspace.scheduler import Scheduler, parse_jobs
 
 if TYPE_CHECKING:
     from cleo.io.io import IO
     from poetry.poetry import Poetry
 
+# Longest line of a command's output that is written at once, longer lines are
+# split so that a single line can't use an unbounded amount of memory.
+MAX_LINE_LENGTH = 64 * 1024
+
 
 class WorkspaceRunCommand(WorkspaceCommand, EnvCommand):
     name = "workspace run"
@@ -19,18 +31,67 @@ class WorkspaceRunCommand(WorkspaceCommand, EnvCommand):
 
     options = [
         option("parallel", None, "Run all commands immediately."),
+        option(
+            "jobs",
+            "j",
+            "Run up to this many commands at once, starting each project's command after its dependencies' succeed.",
+            flag=False,
+        ),
+        option("fail-fast", None, "Terminate the commands that are still running as soon as one fails."),
+        option("keep-going", None, "Keep running the commands of projects that don't depend on a failed project."),
+        option(
+            "cache",
+            None,
+            "Replay the output of commands that succeeded before, unless their project or its dependencies changed.",
+        ),
     ] + WorkspaceCommand.options
     arguments = RunCommand.arguments
 
     def __init__(self):
         super().__init__()
 
-        # Used in parallel mode.
-        self._procs: List[Tuple[subprocess.Popen, "IO"]] = []
+        # Used in parallel mode, the command to run for each project in the order
+        # the projects were selected.
+        self._pending: Dict[str, Tuple[List[str], "Poetry", "IO"]] = {}
+        self._output_lock = threading.Lock()
+        self._jobs: Optional[int] = None
+
+        # Used to terminate running commands in fail fast mode.
+        self._procs: Dict[str, "subprocess.Popen[str]"] = {}
+        self._procs_lock = threading.Lock()
+        self._cancelled: Set[str] = set()
+        self._stopped = False
+
+        # Used in cache mode.
+        self._run_cache: Optional[RunCache] = None
+        self._hasher: Optional[ProjectHasher] = None
+        self._cache_keys: Dict[str, str] = {}
 
     @property
-    def parallel(self) -> str:
-        return self.option("parallel")
+    def parallel(self) -> bool:
+        return self.option("parallel") or self._jobs is not None
+
+    def pre_handle(self) -> int:
+        if self.option("fail-fast") and self.option("keep-going"):
+            self.line("--fail-fast and --keep-going can't be used together", style="error")
+            return 1
+
+        if self.option("jobs") is not None:
+            try:
+                self._jobs = parse_jobs(self.option("jobs"))
+            except ValueError as e:
+                self.line(str(e), style="error")
+                return 1
+        elif self.option("keep-going") and not self.option("parallel"):
+            # Running commands one at a time stops at the first failure, so go
+            # through the scheduler to skip only the failed project's dependents.
+            self._jobs = 1
+
+        if self.option("cache"):
+            self._run_cache = RunCache(self.workspace.root_dir, self.io)
+            self._hasher = ProjectHasher(self.workspace)
+
+        return 0
 
     def handle_each(self, poetry: "Poetry", io: "IO") -> int:
         cmd = RunCommand()
@@ -38,40 +99,154 @@ class WorkspaceRunCommand(WorkspaceCommand, EnvCommand):
         cmd.set_poetry(poetry)
 
         def execute(*args):
+            name = poetry.package.name
             command = self.env.get_command_from_bin(args[0]) + list(args[1:])
-            env = dict(os.environ)
+            if self._hasher:
+                # The interpreter is part of the key, as the environment may be
+                # recreated with another Python version at the same path.
+                python = ".".join(str(v) for v in self.env.version_info[:3])
+                key = json.dumps([self._hasher.hash(name), command, self.env.python, python])
+                self._cache_keys[name] = hashlib.sha256(key.encode()).hexdigest()
 
-            proc = subprocess.Popen(
-                args=command,
-                cwd=poetry.file.path.parent,
-                env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
             if self.parallel:
-                self._procs.append((proc, io))
-            else:
-                return self._communicate(proc, io)
+                self._pending[name] = (command, poetry, io)
+                return 0
+
+            return self._run(command, poetry, io, name=name)
 
         cmd.env.execute = execute
         return cmd.execute(io)
 
     def post_handle(self) -> int:
+        if self._run_cache:
+            self._run_cache.prune()
+
         if not self.parallel:
             return 0
 
-        for proc, io in self._procs:
-            exit_code = self._communicate(proc, io)
-            if exit_code:
-                return exit_code
+        if self._jobs is None:
+            # Start every command immediately.
+            dependencies: Dict[str, List[str]] = {name: [] for name in self._pending}
+        else:
+            # Projects wait for the selected projects they depend on, including
+            # through projects that weren't selected.
+            dependencies = self.workspace.graph.dependencies_among(list(self._pending))
+
+        durations: Dict[str, float] = {}
+
+        def task(name: str) -> int:
+            start = time.monotonic()
+            try:
+                return self._run(*self._pending[name], name=name)
+            finally:
+                durations[name] = time.monotonic() - start
+
+        def on_failure(name: str, exit_code: int) -> None:
+            if self.option("fail-fast"):
+                self._stop()
+
+        scheduler = Scheduler(dependencies, self._jobs, keep_going=self.option("keep-going"))
+        try:
+            results = scheduler.run(task, on_failure)
+        except BaseException:
+            # Don't leave commands running in the background when interrupted.
+            self._stop()
+            raise
+
+        failed = [name for name, exit_code in results.items() if exit_code and name not in self._cancelled]
+        if not failed:
+            return 0
 
-        return 0
+        self._write_summary(failed, results, durations)
+        return results[failed[0]]
+
+    def _write_summary(self, failed: List[str], results: Dict[str, int], durations: Dict[str, float]) -> None:
+        self.line("")
+        self.line(f"{len(failed)} of {len(self._pending)} projects failed:", style="error")
+        for name in failed:
+            self.line(f"  {name}: exit code {results[name]} after {durations[name]:.1f}s")
+
+        cancelled = [name for name in results if name in self._cancelled]
+        if cancelled:
+            self.line(f"Cancelled {len(cancelled)} projects: {', '.join(cancelled)}")
+
+        skipped = [name for name in self._pending if name not in results]
+        if skipped:
+            self.line(f"Skipped {len(skipped)} projects: {', '.join(skipped)}")
+
+    def _stop(self) -> None:
+        with self._procs_lock:
+            self._stopped = True
+            for name, proc in self._procs.items():
+                self._cancelled.add(name)
+                proc.terminate()
+
+    def _run(self, command: List[str], poetry: "Poetry", io: "IO", name: str) -> int:
+        key = self._cache_keys.get(name)
+        if self._run_cache and key:
+            entry = self._run_cache.get(key)
+            if entry:
+                with self._output_lock:
+                    for line in entry["output"]:
+                        io.write_line(line)
+                    io.write_line("<comment>Replayed cached output</>", verbosity=Verbosity.VERBOSE)
+                return entry["exit_code"]
+
+        with self._procs_lock:
+            if self._stopped:
+                # A task that was submitted just before another one failed.
+                self._cancelled.add(name)
+                return 1
 
-    def _communicate(self, proc: subprocess.Popen, io: "IO") -> int:
-        stdout, stderr = proc.communicate()
-        if stdout:
-            io.write_line(stdout.strip())
-        if stderr:
-            io.write_line(stderr.strip())
-        return proc.returncode
+            proc = subprocess.Popen(
+                args=command,
+                cwd=poetry.file.path.parent,
+                env=dict(os.environ),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                encoding="utf-8",
+                errors="replace",
+            )
+            self._procs[name] = proc
+
+        output: List[str] = []
+
+        def write_line(line: str) -> None:
+            # Commands run concurrently in parallel mode, so make sure that lines
+            # from different projects aren't interleaved.
+            with self._output_lock:
+                io.write_line(line)
+            if key:
+                output.append(line)
+
+        try:
+            exit_code = stream_process(proc, write_line)
+        finally:
+            with self._procs_lock:
+                self._procs.pop(name, None)
+
+        # Failures aren't cached, as they may be caused by something outside the
+        # project such as a flaky test.
+        if self._run_cache and key and exit_code == 0:
+            self._run_cache.set(key, exit_code, output)
+        return exit_code
+
+
+def stream_process(proc: "subprocess.Popen[str]", write_line: Callable[[str], None]) -> int:
+    """
+    Writes the lines of a process's stdout and stderr as they are produced and
+    waits for the process to exit.
+    """
+    stdout, stderr = proc.stdout, proc.stderr
+    assert stdout is not None and stderr is not None
+
+    def stream(readline: Callable[[int], str]) -> None:
+        for line in iter(lambda: readline(MAX_LINE_LENGTH), ""):
+            write_line(line.rstrip("\r\n"))
+
+    with stdout, stderr:
+        thread = threading.Thread(target=stream, args=(stderr.readline,), daemon=True)
+        thread.start()
+        stream(stdout.readline)
+        thread.join()
+    return proc.wait()
@@ -21,7 +21,12 @@ class WorkspaceCommand(Command):
         option(
             "include-reverse-dependencies", "r", "Include projects that transitively depend on the selected projects."
         ),
-        option("since", None, "Select projects that have changed since this reference.", flag=False),
+        option(
+            "since",
+            None,
+            "Select projects that have changed since this reference, or since the merge base of <comment>A...B</>.",
+            flag=False,
+        ),
     ]
 
     _workspace: Optional["Workspace"]
@@ -94,9 +99,12 @@ class WorkspaceCommand(Command):
         ref = self.option("since")
 
         diff = Diff(self.workspace, io=self.io)
-        changed = diff.get_changed_projects(ref)
-        if self.option("include-reverse-dependencies"):
-            changed.extend(diff.get_changed_external(ref))
+        try:
+            changed = diff.get_changed_projects(ref)
+            if self.option("include-reverse-dependencies"):
+                changed.extend(diff.get_changed_external(ref))
+        finally:
+            diff.close()
 
         if not changed:
             return []
@@ -109,7 +117,11 @@ class WorkspaceCommand(Command):
         )
 
     def _io_for_project(self, name: str) -> IO:
-        formatter = WorkspaceFormatter(name, decorated=self.io.output.is_decorated())
+        # Keep the styles Poetry adds to its formatter, such as "success" and
+        # "warning", so that they're also recognised in each project's output.
+        formatter = WorkspaceFormatter(
+            name, decorated=self.io.output.is_decorated(), styles=self.io.output.formatter._styles
+        )
 
         # Shallow clone the outputs as we need to set different formatters for
         # each project.
@@ -1,11 +1,16 @@
+import hashlib
+import json
+import os
 import tempfile
 from collections import defaultdict
 from pathlib import Path
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
 
 from poetry.core.pyproject.toml import PyProjectTOML
+from poetry.core.utils.helpers import canonicalize_name
 from poetry.packages.locker import Locker
 
+from poetry_workspace.cache import DiffCache
 from poetry_workspace.errors import VCSError
 from poetry_workspace.graph import DependencyGraph
 from poetry_workspace.vcs import VCS, detect_vcs
@@ -15,10 +20,100 @@ if TYPE_CHECKING:
     from cleo.io.io import IO
     from poetry.core.packages.package import Package
 
+T = TypeVar("T")
+
+# Separates the two sides of a reference compared from their merge base, like
+# `main...HEAD`.
+RANGE_SEPARATOR = "..."
+
+
+class ProjectTrie:
+    """
+    A trie of project root directories keyed by path component. Finding the
+    project that a file belongs to takes time proportional to the depth of the
+    file's path, regardless of the number of projects, and finds the innermost
+    project when projects are nested.
+    """
+
+    _children: Dict[str, "ProjectTrie"]
+    _package: Optional["Package"]
+
+    def __init__(self) -> None:
+        self._children = {}
+        self._package = None
+
+    def add(self, root_dir: Path, package: "Package") -> None:
+        node = self
+        for part in root_dir.parts:
+            node = node._children.setdefault(part, ProjectTrie())
+        node._package = package
+
+    def find(self, file: Path) -> Optional["Package"]:
+        node = self
+        found = None
+        for part in file.parts:
+            child = node._children.get(part)
+            if child is None:
+                break
+            node = child
+            if node._package is not None:
+                found = node._package
+        return found
+
+
+class LockDiff:
+    """
+    The names of the packages that were added to, removed from, or changed in a
+    lock file. A package has changed if any of its locked versions, sources or
+    file hashes differ.
+    """
+
+    added: List[str]
+    removed: List[str]
+    changed: List[str]
+
+    def __init__(self, old: Dict[str, List[Any]], new: Dict[str, List[Any]]):
+        self.added = sorted(name for name in new if name not in old)
+        self.removed = sorted(name for name in old if name not in new)
+        self.changed = sorted(name for name in new if name in old and new[name] != old[name])
+
+
+def locked_packages(content: str) -> Dict[str, List[Any]]:
+    """
+    Parses a lock file's package table into a comparable fingerprint of each
+    package by name. Supports both the `metadata.files` table of older lock
+    files and the per package `files` lists of newer ones.
+    """
+    import tomlkit
+
+    data = json.loads(json.dumps(tomlkit.parse(content)))
+    metadata_files = data.get("metadata", {}).get("files", {})
+
+    packages: Dict[str, List[Any]] = defaultdict(list)
+    for info in data.get("package", []):
+        name = canonicalize_name(info["name"])
+        source = info.get("source", {})
+        files = info.get("files", metadata_files.get(info["name"], []))
+        packages[name].append(
+            [
+                info["version"],
+                source.get("type"),
+                source.get("url"),
+                source.get("reference"),
+                source.get("resolved_reference"),
+                sorted(file.get("hash", "") for file in files),
+            ]
+        )
+
+    # A lock file can contain multiple versions of a package, e.g. with different
+    # markers, so compare them regardless of order.
+    return {name: sorted(versions, key=json.dumps) for name, versions in packages.items()}
+
 
 class Diff:
     _workspace: Workspace
     _vcs: VCS
+    _owns_vcs: bool
     _io: "IO"
 
     def __init__(self, workspace: Workspace, vcs: VCS = None, io: "IO" = None):
@@ -28,33 +123,105 @@ class Diff:
             io = NullIO()
 
         self._workspace = workspace
-        self._vcs = vcs or detect_vcs(io)
+        self._vcs = vcs or detect_vcs(io, workspace.vcs_backend)
+        self._owns_vcs = vcs is None
         self._io = io
 
+    def close(self) -> None:
+        """Closes the VCS if it was detected by this Diff, stopping any git processes it started."""
+        if self._owns_vcs:
+            self._vcs.close()
+
     def get_changed_projects(self, ref: str) -> List["Package"]:
-        package_paths = [(package, Path(package.source_url)) for package in self._workspace.graph.search()]
-
-        def find_parent_project(file_path: Path) -> Optional["Package"]:
-            for package, package_path in package_paths:
-                try:
-                    file_path.relative_to(package_path)
-                    return package
-                except ValueError:
-                    pass
+        return list(self._memoise(ref, "changed_projects", self._get_changed_projects))
+
+    def get_changed_external(self, ref: str) -> List["Package"]:
+        return list(self._memoise(ref, "changed_external", self._get_changed_external))
+
+    def get_lock_diff(self, ref: str) -> "LockDiff":
+        """
+        Compares the package tables of the workspace's lock file at a reference and
+        in the working tree, without resolving either of them.
+        """
+        return self._memoise(ref, "lock_diff", self._get_lock_diff)
+
+    def get_changed_files(self, ref: str) -> List[Path]:
+        return list(self._memoise(ref, "changed_files", self._get_changed_files))
+
+    def get_old_graph(self, ref: str) -> DependencyGraph:
+        return self._memoise(ref, "old_graph", self._get_old_graph)
+
+    def get_commit_range(self, ref: str) -> Optional[Tuple[str, str]]:
+        """
+        Resolves a `base...head` reference to the IDs of the merge base of both
+        sides and of the head commit, the same commits that `git diff base...head`
+        compares. Either side defaults to HEAD. Returns None for a single
+        reference, which is compared with the working tree instead.
+        """
+        return self._memoise(ref, "commit_range", self._get_commit_range)
+
+    def _memoise(self, ref: str, key: str, compute: Callable[[str], T]) -> T:
+        # Results are stored on the workspace, so that they're shared by every Diff
+        # created for it and each reference is only compared once per process.
+        results = self._workspace.diff_results.setdefault(ref, {})
+        if key not in results:
+            results[key] = compute(ref)
+        return results[key]
+
+    def _get_commit_range(self, ref: str) -> Optional[Tuple[str, str]]:
+        if RANGE_SEPARATOR not in ref:
             return None
 
-        changed_files = self.get_changed_files(ref)
-        changed_projects = defaultdict(list)
-        other_files = []
+        base, head = ref.split(RANGE_SEPARATOR, 1)
+        head_id = self._vcs.resolve_ref(head or "HEAD")
+        return self._vcs.merge_base(base or "HEAD", head_id), head_id
 
-        for file in changed_files:
-            package = find_parent_project(file)
-            if package:
-                changed_projects[package].append(file)
-            else:
-                other_files.append(file)
+    def _get_changed_projects(self, ref: str) -> List["Package"]:
+        packages = self._workspace.graph.search()
+        debug = self._io.is_debug()
 
-        if self._io.is_debug():
+        # Changes between two commits never change, so they're cached across runs
+        # for as long as the workspace's projects stay in the same places.
+        commits = self.get_commit_range(ref)
+        cache = DiffCache(self._workspace.root_dir, self._io)
+        layout = ""
+        if commits is not None:
+            layout = self._project_layout_key()
+            names = cache.get_projects(*commits, layout)
+            if names is not None:
+                if debug:
+                    self._io.write_line(f"Using cached changed projects for <info>{ref}</info>")
+                return [package for package in packages if package.name in names]
+
+        trie = ProjectTrie()
+        for package in packages:
+            trie.add(Path(package.source_url), package)
+
+        files: Iterable[Path]
+        if commits is not None:
+            files = self.get_changed_files(ref)
+        else:
+            files = self._vcs.iter_changed_files(ref)
+            if debug:
+                self._io.write_line(f"Files changed since <info>{ref}</info>:")
+
+        # Files are attributed to projects as git lists them, and are only kept
+        # around when they're needed for the debug output.
+        changed_projects: Dict["Package", List[Path]] = {}
+        other_files = []
+        for file in files:
+            owner = trie.find(file)
+            if debug and commits is None:
+                self._io.write_line(f"- {file}")
+            if owner is None:
+                if debug:
+                    other_files.append(file)
+            elif debug:
+                changed_projects.setdefault(owner, []).append(file)
+            elif owner not in changed_projects:
+                changed_projects[owner] = []
+
+        if debug:
             for package, files in changed_projects.items():
                 self._io.write_line(f"Detected changes in project <info>{package.source_url}</info>:")
                 for file in sorted(files):
@@ -65,42 +232,88 @@ class Diff:
                 for file in sorted(other_files):
                     self._io.write_line(f"- {file}")
 
-        return [package for package, _ in package_paths if package in changed_projects]
-
-    def get_changed_external(self, ref: str) -> List["Package"]:
-        old_graph = self.get_old_graph(ref)
-        changed_external = []
+        changed = [package for package in packages if package in changed_projects]
+        if commits is not None:
+            cache.set_projects(*commits, layout, [package.name for package in changed])
+        return changed
 
-        for package in self._workspace.graph:
-            if self._workspace.graph.is_project_package(package):
-                continue
+    def _get_changed_external(self, ref: str) -> List["Package"]:
+        lock_diff = self.get_lock_diff(ref)
+        changed_names = set(lock_diff.added) | set(lock_diff.changed)
 
-            if not old_graph.has_package(package):
-                changed_external.append(package)
+        graph = self._workspace.graph
+        changed_external = [
+            package for package in graph if package.name in changed_names and not graph.is_project_package(package)
+        ]
 
         if self._io.is_very_verbose():
             self._io.write_line("Changed external packages:")
             for package in changed_external:
                 self._io.write_line(f"- {package}")
+            if lock_diff.removed:
+                self._io.write_line("Removed packages:")
+                for name in lock_diff.removed:
+                    self._io.write_line(f"- {name}")
 
         return changed_external
 
-    def get_changed_files(self, ref: str) -> List[Path]:
-        files = self._vcs.get_changed_files(ref)
+    def _get_lock_diff(self, ref: str) -> "LockDiff":
+        lock_path = self._workspace.lock_path
+        commits = self.get_commit_range(ref)
+        if commits is None:
+            old_content = self._vcs.read_files(ref, [lock_path])[lock_path]
+            new_content = lock_path.read_text()
+        else:
+            old_content = self._vcs.read_files(commits[0], [lock_path])[lock_path]
+            head_content = self._vcs.read_files(commits[1], [lock_path])[lock_path]
+            if head_content is None:
+                raise VCSError(f"{lock_path.name} does not exist at {commits[1]}")
+            new_content = head_content
+
+        if old_content is None:
+            raise VCSError(f"{lock_path.name} does not exist at {ref}")
+
+        return LockDiff(locked_packages(old_content), locked_packages(new_content))
+
+    def _get_changed_files(self, ref: str) -> List[Path]:
+        commits = self.get_commit_range(ref)
+        if commits is None:
+            files = self._vcs.get_changed_files(ref)
+        else:
+            cache = DiffCache(self._workspace.root_dir, self._io)
+            cached = cache.get_files(*commits)
+            if cached is not None:
+                files = [self._vcs.root / file for file in cached]
+            else:
+                files = self._vcs.get_changed_files(f"{commits[0]}..{commits[1]}")
+                cache.set_files(*commits, [file.relative_to(self._vcs.root).as_posix() for file in files])
+                cache.prune()
+
         if self._io.is_debug():
             self._io.write_line(f"Files changed since <info>{ref}</info>:")
             for file in files:
                 self._io.write_line(f"- {file}")
         return files
 
-    def get_old_graph(self, ref: str) -> DependencyGraph:
-        old_pyproject_toml = self._vcs.read_file(ref, self._workspace.poetry.file.path)
-        old_poetry_lock = self._vcs.read_file(ref, self._workspace.poetry.locker.lock.path)
+    def _get_old_graph(self, ref: str) -> DependencyGraph:
+        commits = self.get_commit_range(ref)
+        if commits is not None:
+            ref = commits[0]
+
+        pyproject_path = self._workspace.poetry.file.path
+        lock_path = self._workspace.poetry.locker.lock.path
+        old_files = self._vcs.read_files(ref, [pyproject_path, lock_path])
+        old_pyproject = old_files[pyproject_path]
+        if old_pyproject is None:
+            raise VCSError(f"{pyproject_path.name} does not exist at {ref}")
+        old_lock = old_files[lock_path]
+        if old_lock is None:
+            raise VCSError(f"{lock_path.name} does not exist at {ref}")
 
         with tempfile.TemporaryDirectory() as temp_dir:
             dir_path = Path(temp_dir)
-            (dir_path / "pyproject.toml").write_text(old_pyproject_toml)
-            (dir_path / "poetry.lock").write_text(old_poetry_lock)
+            (dir_path / "pyproject.toml").write_text(old_pyproject)
+            (dir_path / "poetry.lock").write_text(old_lock)
 
             local_config = PyProjectTOML(path=dir_path / "pyproject.toml").poetry_config
             locker = Locker(dir_path / "poetry.lock", local_config)
@@ -108,33 +321,38 @@ class Diff:
 
             # When creating the locked repository below, Poetry expects to find the
             # pyproject.toml or setup.py file for each of the directory dependencies.
-            # Here we iterate through the lock file and try to populate those package
-            # files from the old VCS reference.
+            # Here we find those package files in the lock file and read all of them
+            # from the old VCS reference at once.
+            package_files: Dict[str, List[Path]] = {}
             for package_info in locker.lock_data["package"]:
                 source = package_info.get("source", {})
                 if source.get("type") != "directory":
                     continue
 
-                package_path = Path(source.get("url")) / "pyproject.toml"
-                package_contents = None
-                try:
-                    package_contents = self._vcs.read_file(ref, workspace_dir / package_path)
-                except VCSError:
-                    pass
+                package_dir = Path(source.get("url"))
+                package_files[package_info["name"]] = [package_dir / "pyproject.toml", package_dir / "setup.py"]
 
-                if not package_contents:
-                    package_path = Path(source.get("url")) / "setup.py"
-                    try:
-                        package_contents = self._vcs.read_file(ref, workspace_dir / package_path)
-                    except VCSError:
-                        pass
+            old_package_files = self._vcs.read_files(
+                ref, [workspace_dir / path for paths in package_files.values() for path in paths]
+            )
 
-                if not package_contents:
-                    raise VCSError(f"package {package_info['name']} at {ref} does not seem to be a Python package")
+            for name, paths in package_files.items():
+                package_path = next((path for path in paths if old_package_files[workspace_dir / path]), None)
+                if package_path is None:
+                    raise VCSError(f"package {name} at {ref} does not seem to be a Python package")
 
-                temp_package_path = temp_dir / package_path
-                temp_package_path.parent.mkdir(parents=True)
-                temp_package_path.write_text(package_contents)
+                content = old_package_files[workspace_dir / package_path]
+                assert content is not None
+                temp_package_path = dir_path / package_path
+                temp_package_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_package_path.write_text(content)
 
             locked_repo = locker.locked_repository(with_dev_reqs=True)
             return DependencyGraph(locked_repo, [])
+
+    def _project_layout_key(self) -> str:
+        layout = sorted(
+            [project.name, Path(os.path.relpath(project.root_dir, self._vcs.root)).as_posix()]
+            for project in self._workspace.projects
+        )
+        return hashlib.sha256(json.dumps(layout).encode()).hexdigest()
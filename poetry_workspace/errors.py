@@ -12,3 +12,7 @@ class GraphError(WorkspaceError):
 
 class VCSError(WorkspaceError):
     pass
+
+
+class PublishError(WorkspaceError):
+    pass
@@ -9,3 +9,13 @@ class WorkspaceFormatter(Formatter):
     def format(self, message: str) -> str:
         lines = message.split("\n")
         return super().format("\n".join(f"<c2>{self._prefix}></> {line}" for line in lines))
+
+
+class RawFormatter(Formatter):
+    """
+    Leaves style tags in messages untouched, so that output captured in one
+    place can be formatted when it's written somewhere else.
+    """
+
+    def format(self, message: str) -> str:
+        return message
@@ -1,5 +1,8 @@
-from collections import defaultdict
-from typing import TYPE_CHECKING, Dict, Iterator, List, Set
+from array import array
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from poetry.core.utils.helpers import canonicalize_name
 
 from poetry_workspace.errors import GraphError
 
@@ -7,65 +10,257 @@ if TYPE_CHECKING:
     from poetry.core.packages.package import Package
     from poetry.repositories import Repository
 
+# Below this many selected packages, searching the graph directly is cheaper
+# than building the reachability index.
+_MIN_INDEXED_SEARCH = 4
+
+
+class Adjacency:
+    """
+    Compressed sparse row representation of a graph's edges between packages
+    identified by dense integer ids. The targets of the edges from node `i` are
+    stored in `targets[offsets[i]:offsets[i + 1]]`, in the order they were given.
+    """
+
+    offsets: "array[int]"
+    targets: "array[int]"
+
+    def __init__(self, size: int, edges: Sequence[Tuple[int, int]]):
+        counts = [0] * (size + 1)
+        for source, _target in edges:
+            counts[source + 1] += 1
+        for i in range(size):
+            counts[i + 1] += counts[i]
+
+        positions = counts[:size]
+        targets = [0] * len(edges)
+        for source, target in edges:
+            targets[positions[source]] = target
+            positions[source] += 1
+
+        self.offsets = array("l", counts)
+        self.targets = array("l", targets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, node: int) -> "array[int]":
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+    def degree(self, node: int) -> int:
+        return self.offsets[node + 1] - self.offsets[node]
+
+
+class ReachabilityIndex:
+    """
+    Transitive dependencies and reverse dependencies of a set of packages, stored
+    as bitsets of package ids. Once built, the packages related to any number of
+    the indexed packages can be found with a few bitwise unions.
+    """
+
+    dependencies: Dict[int, int]
+    reverse_dependencies: Dict[int, int]
+
+    def __init__(self, deps: Adjacency, rdeps: Adjacency, package_ids: Iterable[int]):
+        keep = set(package_ids)
+        # Package ids are assigned in topological order, so each package's
+        # dependencies have lower ids and its reverse dependencies higher ids.
+        self.dependencies = reachability_bitsets(range(len(deps)), deps, rdeps, keep)
+        self.reverse_dependencies = reachability_bitsets(reversed(range(len(deps))), rdeps, deps, keep)
+
+    def contains(self, package_ids: Iterable[int]) -> bool:
+        return all(i in self.dependencies for i in package_ids)
+
 
 class DependencyGraph:
+    """
+    Packages are identified internally by dense integer ids, assigned in
+    topological order, and edges are stored as compact integer arrays. Package
+    objects are only looked up when they are returned to callers.
+    """
+
     _repo: "Repository"
-    _workspace_packages: Dict[str, "Package"]
-    _deps: Dict["Package", List["Package"]]
-    _rdeps: Dict["Package", List["Package"]]
-    _levels: Dict["Package", int]
-    _sorted: List["Package"]
+    _workspace_package_names: Set[str]
+    _packages: List["Package"]
+    _ids_by_name: Dict[str, List[int]]
+    _deps: Adjacency
+    _rdeps: Adjacency
+    _levels: "array[int]"
+    _index: Optional["ReachabilityIndex"]
 
     def __init__(self, repo: "Repository", workspace_packages: List["Package"]):
-        self._repo = repo
-        self._workspace_packages = {package.name: package for package in workspace_packages}
-        self._deps = {}
-        self._rdeps = {}
-
-        for package in repo.packages:
-            # Ensure that all keys exist.
-            self._deps[package] = []
-            self._rdeps[package] = []
+        packages = list(repo.packages)
 
+        workspace_packages_by_name = {package.name: package for package in workspace_packages}
+        for package in packages:
             # Add non-default dependency groups.
-            workspace_package = self._workspace_packages.get(package.name)
+            workspace_package = workspace_packages_by_name.get(package.name)
             if workspace_package:
                 package._dependency_groups = workspace_package._dependency_groups
 
-        for package in repo.packages:
+        # Index packages by name so that resolving each edge doesn't require a scan
+        # over the whole repository. Lock files usually contain a single version of
+        # each package, in which case no version constraint checks are needed.
+        ids_by_name: Dict[str, List[int]] = defaultdict(list)
+        for i, package in enumerate(packages):
+            ids_by_name[package.name].append(i)
+
+        edges: List[Tuple[int, int]] = []
+        for i, package in enumerate(packages):
             for dep in package.all_requires:
-                found = repo.find_packages(dep)
+                found = ids_by_name.get(dep.name, [])
+                if len(found) > 1:
+                    found = [j for j in found if dep.accepts(packages[j])]
                 if len(found) == 0:
                     raise ValueError(f"no packages found for dependency {dep.name}")
                 if len(found) > 1:
                     raise ValueError(f"multiple packages found for dependency {dep.name}")
 
-                self._deps[package].append(found[0])
-                self._rdeps[found[0]].append(package)
+                edges.append((i, found[0]))
+
+        levels = topological_sort(
+            Adjacency(len(packages), edges),
+            Adjacency(len(packages), reverse(edges)),
+            [package.name for package in packages],
+        )
+
+        # Renumber packages in topological order, so that iterating over the graph
+        # and sorting search results only requires comparing ids.
+        order = sorted(range(len(packages)), key=lambda i: (levels[i], packages[i].name))
+        ids = [0] * len(packages)
+        for new_id, old_id in enumerate(order):
+            ids[old_id] = new_id
+
+        self._repo = repo
+        self._init(
+            [packages[i] for i in order],
+            [(ids[source], ids[target]) for source, target in edges],
+            [levels[i] for i in order],
+            {package.name for package in workspace_packages},
+        )
+
+    def _init(
+        self,
+        packages: List["Package"],
+        edges: List[Tuple[int, int]],
+        levels: List[int],
+        workspace_package_names: Set[str],
+    ) -> None:
+        self._packages = packages
+        self._deps = Adjacency(len(packages), edges)
+        self._rdeps = Adjacency(len(packages), reverse(edges))
+        self._levels = array("l", levels)
+        self._workspace_package_names = workspace_package_names
+        self._index = None
+
+        self._ids_by_name = defaultdict(list)
+        for i, package in enumerate(packages):
+            self._ids_by_name[package.name].append(i)
 
-        self._levels = topological_sort(self._deps, self._rdeps)
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> "DependencyGraph":
+        """
+        Recreates a dependency graph from a snapshot returned by `to_snapshot`,
+        without needing to parse the lock file or resolve dependencies again. The
+        restored packages only have the fields stored in the snapshot, their
+        dependencies are only available through the graph.
+        """
+        from poetry.core.packages.package import Package
+        from poetry.repositories import Repository
 
-        sorted_levels = sorted(self._levels.items(), key=lambda pair: (pair[1], pair[0].name))
-        self._sorted = [package for package, _level in sorted_levels]
+        packages = [
+            Package(
+                info["name"],
+                info["version"],
+                source_type=info.get("source_type"),
+                source_url=info.get("source_url"),
+                source_reference=info.get("source_reference"),
+                source_resolved_reference=info.get("source_resolved_reference"),
+            )
+            for info in snapshot["packages"]
+        ]
+        flat_edges = snapshot["edges"]
+
+        graph = cls.__new__(cls)
+        graph._repo = Repository(packages)
+        graph._init(
+            packages,
+            list(zip(flat_edges[::2], flat_edges[1::2])),
+            snapshot["levels"],
+            set(snapshot["workspace_packages"]),
+        )
+        return graph
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """
+        Returns a JSON serializable snapshot of the graph. Packages are stored in
+        topological order and edges as a flat list of package id pairs.
+        """
+        flat_edges: List[int] = []
+        for source in range(len(self._packages)):
+            for target in self._deps[source]:
+                flat_edges.extend((source, target))
+
+        return {
+            "packages": [
+                {
+                    "name": package.pretty_name,
+                    "version": package.pretty_version,
+                    "source_type": package.source_type,
+                    "source_url": package.source_url,
+                    "source_reference": package.source_reference,
+                    "source_resolved_reference": package.source_resolved_reference,
+                }
+                for package in self._packages
+            ],
+            "workspace_packages": sorted(self._workspace_package_names),
+            "edges": flat_edges,
+            "levels": list(self._levels),
+        }
 
     def __iter__(self) -> Iterator["Package"]:
-        return iter(self._sorted)
+        return iter(self._packages)
 
     def __len__(self) -> int:
-        return len(self._sorted)
+        return len(self._packages)
 
     def has_package(self, package: "Package") -> bool:
         found = self._repo.find_packages(package.to_dependency())
         return len(found) > 0
 
     def is_project_package(self, package: "Package") -> bool:
-        return package.name in self._workspace_packages
+        return package.name in self._workspace_package_names
+
+    def level(self, name: str) -> int:
+        return self._levels[self._find_id(name)]
 
     def dependencies(self, name: str) -> List["Package"]:
-        return self._deps[self.find_package(name)]
+        return [self._packages[i] for i in self._deps[self._find_id(name)]]
 
     def reverse_dependencies(self, name: str) -> List["Package"]:
-        return self._rdeps[self.find_package(name)]
+        return [self._packages[i] for i in self._rdeps[self._find_id(name)]]
+
+    def dependencies_among(self, names: List[str]) -> Dict[str, List[str]]:
+        """
+        Returns the given packages that each of the given packages depends on,
+        directly or through packages that weren't given.
+        """
+        ids = {name: self._find_id(name) for name in names}
+        selected = 0
+        for i in ids.values():
+            selected |= 1 << i
+
+        results: Dict[str, List[str]] = {}
+        for name, i in ids.items():
+            mask = self.index.dependencies.get(i)
+            if mask is None:
+                # Only project packages are indexed.
+                mask = 0
+                for j in transitive_closure([i], self._deps):
+                    mask |= 1 << j
+            results[name] = [self._packages[j].name for j in bitset_to_ids(mask & selected & ~(1 << i))]
+
+        return results
 
     def search(
         self,
@@ -76,66 +271,163 @@ class DependencyGraph:
     ) -> List["Package"]:
         if not package_names:
             if include_external:
-                return self._sorted
-            return [package for package in self._sorted if self.is_project_package(package)]
-
-        selected = set()
-        for name in package_names:
-            selected.add(self.find_package(name))
-
-        def add_dep(acc: Set["Package"], package: "Package", deps: Dict["Package", List["Package"]]) -> None:
-            if package in acc:
-                return
-            acc.add(package)
-            for dep in deps[package]:
-                add_dep(acc, dep, deps)
-
-        dependencies: Set["Package"] = set()
-        if include_dependencies:
-            for package in selected:
-                add_dep(dependencies, package, self._deps)
-
-        reverse_dependencies: Set["Package"] = set()
-        if include_reverse_dependencies:
-            for package in selected:
-                add_dep(reverse_dependencies, package, self._rdeps)
-
-        results = selected.union(dependencies).union(reverse_dependencies)
+                return list(self._packages)
+            return [package for package in self._packages if self.is_project_package(package)]
+
+        selected = {self._find_id(name) for name in package_names}
+
+        if len(selected) >= _MIN_INDEXED_SEARCH and self.index.contains(selected):
+            mask = 0
+            for i in selected:
+                mask |= 1 << i
+                if include_dependencies:
+                    mask |= self.index.dependencies[i]
+                if include_reverse_dependencies:
+                    mask |= self.index.reverse_dependencies[i]
+            results = bitset_to_ids(mask)
+        else:
+            result_set = set(selected)
+            if include_dependencies:
+                result_set |= transitive_closure(selected, self._deps)
+            if include_reverse_dependencies:
+                result_set |= transitive_closure(selected, self._rdeps)
+            results = sorted(result_set)
+
+        packages = [self._packages[i] for i in results]
         if not include_external:
-            results = {package for package in results if self.is_project_package(package)}
+            packages = [package for package in packages if self.is_project_package(package)]
+
+        return packages
 
-        return sorted(results, key=lambda package: (self._levels[package], package.name))
+    @property
+    def index(self) -> "ReachabilityIndex":
+        if self._index is None:
+            project_ids = [i for i, package in enumerate(self._packages) if self.is_project_package(package)]
+            self._index = ReachabilityIndex(self._deps, self._rdeps, project_ids)
+        return self._index
 
     def find_package(self, name: str) -> "Package":
-        results = self._repo.search(name)
-        if not results:
+        return self._packages[self._find_id(name)]
+
+    def _find_id(self, name: str) -> int:
+        ids = self._ids_by_name.get(canonicalize_name(name))
+        if not ids:
             raise GraphError(f"Project '{name}' is not in the dependency graph")
-        return results[0]
+        return ids[0]
 
 
-def topological_sort(
-    deps: Dict["Package", List["Package"]],
-    rdeps: Dict["Package", List["Package"]],
-) -> Dict["Package", int]:
+def reachability_bitsets(
+    order: Iterable[int], edges: Adjacency, rev_edges: Adjacency, keep: Set[int]
+) -> Dict[int, int]:
     """
-    Returns a dictionary mapping a package to its level. Levels are strictly
+    Returns bitsets of the packages reachable from each of the `keep` packages
+    by following the given edges. Packages must be visited in an order where
+    edge targets come first. Intermediate bitsets are discarded as soon as all
+    packages with edges to them have been visited, to bound memory usage.
+    """
+    remaining = [rev_edges.degree(i) for i in range(len(edges))]
+    bitsets: Dict[int, int] = {}
+    results: Dict[int, int] = {}
+
+    for i in order:
+        mask = 1 << i
+        for target in edges[i]:
+            mask |= bitsets[target]
+            remaining[target] -= 1
+            if remaining[target] == 0:
+                del bitsets[target]
+
+        if remaining[i] > 0:
+            bitsets[i] = mask
+        if i in keep:
+            results[i] = mask
+
+    return results
+
+
+def bitset_to_ids(mask: int) -> List[int]:
+    return [i for i, bit in enumerate(reversed(bin(mask)[2:])) if bit == "1"]
+
+
+def reverse(edges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    return [(target, source) for source, target in edges]
+
+
+def topological_sort(deps: Adjacency, rdeps: Adjacency, names: Sequence[str]) -> List[int]:
+    """
+    Returns a list mapping a package id to its level. Levels are strictly
     negative integers that represent the maximum number of connections from
     the root to the package, e.g. -1 is the highest possible level and means
     that it is a direct dependency of the root and no other transitive package
     depends upon it.
+
+    Packages are visited in topological order (Kahn's algorithm), so that each
+    package's level is final by the time its dependencies are visited. Raises
+    a GraphError, using the package names to describe the cycle, if the packages
+    contain a dependency cycle.
     """
-    levels: Dict["Package", int] = defaultdict(int)
+    size = len(deps)
+    levels = [0] * size
+    remaining = [rdeps.degree(i) for i in range(size)]
+
+    # Begin iteration at top level deps.
+    queue = deque(i for i in range(size) if remaining[i] == 0)
+    for i in queue:
+        levels[i] = -1
 
-    def iter(package: "Package", level: int) -> None:
-        if levels[package] <= level:
-            return
-        levels[package] = level
+    visited = 0
+    while queue:
+        package = queue.popleft()
+        visited += 1
+        level = levels[package] - 1
         for dep in deps[package]:
-            iter(dep, level - 1)
+            if level < levels[dep]:
+                levels[dep] = level
+            remaining[dep] -= 1
+            if remaining[dep] == 0:
+                queue.append(dep)
 
-    for package, package_rdeps in rdeps.items():
-        if len(package_rdeps) == 0:
-            # Begin iteration at top level deps.
-            iter(package, -1)
+    if visited < size:
+        cycle = find_cycle([i for i in range(size) if remaining[i] > 0], rdeps)
+        raise GraphError(f"Dependency cycle detected: {' -> '.join(names[i] for i in cycle)}")
 
     return levels
+
+
+def find_cycle(packages: List[int], rdeps: Adjacency) -> List[int]:
+    """
+    Returns a dependency cycle among packages that were never visited by the
+    topological sort. Every such package has a reverse dependency that was also
+    never visited, so following them must eventually revisit a package.
+    """
+    unvisited = set(packages)
+    path: List[int] = []
+    positions: Dict[int, int] = {}
+
+    package = packages[0]
+    while package not in positions:
+        positions[package] = len(path)
+        path.append(package)
+        package = next(rdep for rdep in rdeps[package] if rdep in unvisited)
+
+    # The path follows reverse dependencies, so flip it to read as "depends on".
+    cycle = path[positions[package] :] + [package]
+    return list(reversed(cycle))
+
+
+def transitive_closure(packages: Iterable[int], edges: Adjacency) -> Set[int]:
+    """
+    Returns the given package ids along with the ids of all packages reachable
+    from them by following the given edges.
+    """
+    visited = bytearray(len(edges))
+    results: Set[int] = set()
+    stack = list(packages)
+    while stack:
+        package = stack.pop()
+        if visited[package]:
+            continue
+        visited[package] = 1
+        results.add(package)
+        stack.extend(edges[package])
+    return results
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from poetry_workspace.errors import WorkspaceError
+
+if TYPE_CHECKING:
+    from poetry.poetry import Poetry
+
+    from poetry_workspace.workspace import Workspace
+
+# Directories that never contain a project's sources, such as virtual
+# environments, build outputs and tool caches. Hidden directories, such as VCS
+# metadata and .venv, are skipped as well.
+IGNORED_DIRS = {"__pycache__", "build", "dist", "node_modules", "venv"}
+
+
+def project_files(root_dir: Path) -> List[Path]:
+    """
+    Returns the files in a project's source tree, skipping hidden directories
+    and directories in `IGNORED_DIRS`. Paths are sorted so that hashes computed
+    from them don't depend on the order the file system lists them in.
+    """
+    files: List[Path] = []
+    for dir_path, dir_names, file_names in os.walk(root_dir):
+        dir_names[:] = [name for name in dir_names if not name.startswith(".") and name not in IGNORED_DIRS]
+        files.extend(Path(dir_path) / name for name in file_names)
+    return sorted(files)
+
+
+def hash_files(root_dir: Path, files: Iterable[Path]) -> str:
+    """
+    Returns a hash of the files' paths relative to `root_dir` and their contents.
+    Broken symlinks have no contents, so they are hashed by their target instead.
+    """
+    digest = hashlib.sha256()
+    for file in files:
+        path = Path(os.path.relpath(file, root_dir)).as_posix()
+        if os.path.islink(file) and not os.path.exists(file):
+            digest.update(f"{path}\0->{os.readlink(file)}\0".encode())
+            continue
+
+        with open(file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            digest.update(f"{path}\0{size}\0".encode())
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_build_inputs(poetry: "Poetry", fmt: str, pinned_versions: Optional[Dict[str, str]] = None) -> str:
+    """
+    Returns a hash of everything that a project's built artifacts depend on: the
+    files included in the package, its pyproject.toml and readme files, and the
+    versions its path dependencies are pinned to. The pinned versions are
+    resolved if they aren't given.
+    """
+    from cleo.io.null_io import NullIO
+    from poetry.core.masonry.builders.sdist import SdistBuilder
+
+    from poetry_workspace.commands.build import PathDependencyVersions
+
+    root_dir = poetry.file.parent
+    builder = SdistBuilder(poetry, ignore_packages_formats=True)
+    files = {include.path for include in builder.find_files_to_add(exclude_build=False)}
+    files.add(poetry.file.path)
+    if poetry.package.readme:
+        files.add(root_dir / poetry.package.readme)
+
+    if pinned_versions is None:
+        pinned_versions = PathDependencyVersions(NullIO()).resolve(poetry.package)
+
+    content = {
+        "format": fmt,
+        "files": hash_files(root_dir, sorted(files)),
+        "path_dependencies": sorted([name, version] for name, version in pinned_versions.items()),
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+class ProjectHasher:
+    """
+    Computes content hashes of workspace projects that change whenever the
+    project's source tree, the source tree of any workspace project it depends
+    on, or the locked version of any external package it depends on changes.
+    """
+
+    _workspace: "Workspace"
+    _hashes: Dict[str, str]
+
+    def __init__(self, workspace: "Workspace"):
+        self._workspace = workspace
+        self._hashes = {}
+
+    def hash(self, name: str) -> str:
+        if name not in self._hashes:
+            self._hashes[name] = self._hash(name)
+        return self._hashes[name]
+
+    def _hash(self, name: str) -> str:
+        graph = self._workspace.graph
+        project = self._workspace.get_project(name)
+        if project is None:
+            raise WorkspaceError(f"Project '{name}' not found in workspace")
+
+        dependencies = {}
+        external = []
+        for package in graph.search(package_names=[name], include_dependencies=True, include_external=True):
+            if package.name == name:
+                continue
+            if graph.is_project_package(package):
+                # Search results are in topological order, so the dependency's own
+                # dependencies have already been hashed by the time it's reached.
+                dependencies[package.name] = self.hash(package.name)
+            else:
+                external.append(
+                    [
+                        package.name,
+                        package.version.text,
+                        package.source_type,
+                        package.source_url,
+                        package.source_reference,
+                    ]
+                )
+
+        content = {
+            "sources": hash_files(project.root_dir, project_files(project.root_dir)),
+            "dependencies": dependencies,
+            "external": external,
+        }
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
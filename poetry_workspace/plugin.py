@@ -12,9 +12,10 @@ from poetry.poetry import Poetry
 
 from poetry_workspace.commands import loader
 from poetry_workspace.commands.workspace.workspace import WorkspaceCommand
-from poetry_workspace.workspace import Workspace, is_workspace_pyproject
+from poetry_workspace.workspace import Workspace, discover_projects, is_workspace_pyproject, monkeypatch_json_schema
 
 if TYPE_CHECKING:
+    from cleo.commands.command import Command
     from cleo.events.console_command_event import ConsoleCommandEvent
     from cleo.events.event_dispatcher import EventDispatcher
     from cleo.io.io import IO
@@ -33,6 +34,11 @@ class WorkspacePlugin(ApplicationPlugin):
 
         monkeypatch_version_parser()
 
+        if not uses_workspace(command):
+            # Avoid the cost of finding the workspace for commands that do not use
+            # it, e.g. `poetry config`, `poetry cache` or `poetry help`.
+            return
+
         workspace = find_workspace(command.application, event.io)
         if workspace is None:
             return
@@ -48,6 +54,16 @@ class WorkspacePlugin(ApplicationPlugin):
             command.set_workspace(workspace)
 
 
+def uses_workspace(command: "Command") -> bool:
+    """
+    Returns whether the command makes use of the workspace. Environment commands
+    use the workspace's virtualenv, installer commands additionally resolve and
+    install the workspace's dependencies, and workspace commands operate on the
+    workspace projects.
+    """
+    return isinstance(command, (EnvCommand, WorkspaceCommand))
+
+
 def set_installer_poetry(command: InstallerCommand, io: "IO", workspace: Workspace) -> None:
     poetry = Poetry(
         file=BaseFactory.locate(Path.cwd()),
@@ -68,13 +84,12 @@ def set_installer_poetry(command: InstallerCommand, io: "IO", workspace: Workspa
 def monkeypatch_env_manager(workspace: Workspace) -> None:
     from poetry.utils.env import EnvManager, SystemEnv, VirtualEnv
 
-    workspace_poetry = workspace.poetry
     original_method = EnvManager.create_venv
 
     def create_venv(self: EnvManager, *args: Any, **kwargs: Any) -> Union[SystemEnv, VirtualEnv]:
         # Set env manager's Poetry instance to the workspace Poetry instance
         # so that it creates and uses a workspace level virtualenv.
-        self._poetry = workspace_poetry
+        self._poetry = workspace.poetry
         return original_method(self, *args, **kwargs)
 
     EnvManager.create_venv = create_venv
@@ -98,7 +113,7 @@ def monkeypatch_version_solver(workspace: Workspace) -> None:
     from poetry.mixology.version_solver import VersionSolver
 
     original_method = VersionSolver.solve
-    workspace_packages = set(project.package.name for project in workspace.projects)
+    workspace_packages = set(project.name for project in workspace.projects)
 
     def solve(self: VersionSolver) -> SolverResult:
         self._use_latest = sorted(set(self._use_latest) | workspace_packages)
@@ -122,20 +137,27 @@ def monkeypatch_version_parser() -> None:
 
 
 def find_workspace(application: "Application", io: "IO") -> Optional[Workspace]:
-    cwd = Path.cwd()
-    for dir_path in [cwd] + list(cwd.parents):
+    # The application's Poetry instance is the workspace root's Poetry instance
+    # when run from the root project's tree, which requires the custom schema.
+    monkeypatch_json_schema()
+    project_file = application.poetry.file.path
+
+    # Poetry locates the current project by searching upwards from the current
+    # directory, so there can be no workspace root between the two.
+    for dir_path in [project_file.parent] + list(project_file.parent.parents):
         pyproject = PyProjectTOML(dir_path / "pyproject.toml")
         if not is_workspace_pyproject(pyproject):
             continue
 
-        workspace = Workspace(pyproject, io)
-        if workspace.poetry.file.path == application.poetry.file.path:
+        if pyproject.file.path == project_file:
             # Currently in workspace's root project tree.
-            return workspace
-
-        for project in workspace.projects:
-            if project.file.path == application.poetry.file.path:
-                # Currently in a workspace project's tree.
-                return workspace
+            return Workspace(pyproject, io)
+
+        # Only create the workspace once the current project is known to belong
+        # to it, otherwise keep searching for an outer workspace.
+        projects = discover_projects(pyproject, io)
+        if any(project.file_path == project_file for project in projects):
+            # Currently in a workspace project's tree.
+            return Workspace(pyproject, io, projects=projects)
 
     return None
@@ -0,0 +1,68 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from poetry.core.utils.helpers import canonicalize_name
+from poetry.factory import Factory
+
+if TYPE_CHECKING:
+    from poetry.packages.project_package import ProjectPackage
+    from poetry.poetry import Poetry
+
+
+class Project:
+    """
+    A workspace project backed by its parsed `tool.poetry` configuration. The
+    project's package and full Poetry instance are only created when accessed,
+    as creating a Poetry instance for every project in a large workspace is slow.
+    """
+
+    _file_path: Path
+    _config: Dict[str, Any]
+    _package: Optional["ProjectPackage"]
+    _poetry: Optional["Poetry"]
+
+    def __init__(self, file_path: Path, config: Dict[str, Any]):
+        self._file_path = file_path
+        self._config = config
+        self._package = None
+        self._poetry = None
+
+    def __repr__(self) -> str:
+        return f"Project({self.pretty_name!r}, {str(self._file_path)!r})"
+
+    @property
+    def name(self) -> str:
+        return canonicalize_name(self.pretty_name)
+
+    @property
+    def pretty_name(self) -> str:
+        return self._config["name"]
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
+
+    @property
+    def root_dir(self) -> Path:
+        return self._file_path.parent
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self._config
+
+    @property
+    def package(self) -> "ProjectPackage":
+        if self._package is None:
+            package = Factory.get_package(self._config["name"], self._config["version"])
+            self._package = Factory.configure_package(package, self._config, self.root_dir)
+        return self._package
+
+    @property
+    def poetry(self) -> "Poetry":
+        if self._poetry is None:
+            self._poetry = Factory().create_poetry(self._file_path)
+        return self._poetry
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._poetry is not None
@@ -0,0 +1,280 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import requests
+from cleo.io.null_io import NullIO
+from poetry.publishing.uploader import Uploader, UploadError
+from requests.adapters import HTTPAdapter
+
+from poetry_workspace.errors import PublishError
+
+if TYPE_CHECKING:
+    from cleo.io.io import IO
+    from poetry.poetry import Poetry
+
+PYPI_UPLOAD_URL = "https://upload.pypi.org/legacy/"
+
+# Responses with these status codes are transient server errors, so the upload
+# is retried with an exponential backoff.
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+# The outcomes of uploading a file.
+UPLOADED = "uploaded"
+SKIPPED = "skipped"
+DRY_RUN = "dry run"
+
+
+class ProjectUploader(Uploader):
+    """
+    Poetry's uploader for a single project, posting through a session that is
+    shared with the uploaders of the other projects, so that connections to the
+    repository are reused.
+    """
+
+    _session: Optional[requests.Session]
+    _pool_size: int
+
+    def __init__(self, poetry: "Poetry", session: Optional[requests.Session] = None, pool_size: int = 1):
+        # Uploads run concurrently, so progress bars aren't shown.
+        super().__init__(poetry, NullIO())
+        self._session = session
+        self._pool_size = pool_size
+
+    @property
+    def adapter(self) -> HTTPAdapter:
+        # Failed uploads are retried by the publisher, as a file's content can't
+        # be sent again by the adapter.
+        return HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+
+    def make_session(self) -> requests.Session:
+        if self._session is None:
+            self._session = super().make_session()
+        return self._session
+
+    def upload_file(self, url: str, file: Path, dry_run: bool = False) -> Optional[requests.Response]:
+        """Uploads a file, streaming it from disk, and returns the response unless it's a dry run."""
+        return self._upload_file(self.make_session(), url, file, dry_run)
+
+
+class WorkspacePublisher:
+    """
+    Uploads the artifacts of several workspace projects to a repository
+    concurrently with Poetry's uploader. All uploads share a single HTTP session,
+    so connections to the repository are pooled and reused instead of being
+    established for every project. Uploads that fail with a connection error or a
+    transient server error are retried, and with `skip_existing` files that the
+    repository already has are skipped instead of failing the upload.
+    """
+
+    _url: str
+    _repository_name: str
+    _jobs: int
+    _skip_existing: bool
+    _dry_run: bool
+    _retries: int
+    _backoff: float
+    _username: Optional[str]
+    _password: Optional[str]
+    _cert: Optional[Path]
+    _client_cert: Optional[Path]
+    _session: Optional[requests.Session]
+    _output_lock: threading.Lock
+
+    def __init__(
+        self,
+        url: str,
+        repository_name: str,
+        jobs: int = 1,
+        skip_existing: bool = False,
+        dry_run: bool = False,
+        retries: int = 3,
+        backoff: float = 1.0,
+    ):
+        self._url = url
+        self._repository_name = repository_name
+        self._jobs = jobs
+        self._skip_existing = skip_existing
+        self._dry_run = dry_run
+        self._retries = retries
+        self._backoff = backoff
+        self._username = None
+        self._password = None
+        self._cert = None
+        self._client_cert = None
+        self._session = None
+        self._output_lock = threading.Lock()
+
+    @classmethod
+    def for_repository(
+        cls,
+        poetry: "Poetry",
+        io: "IO",
+        repository_name: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        cert: Optional[Path] = None,
+        client_cert: Optional[Path] = None,
+        **kwargs: Any,
+    ) -> "WorkspacePublisher":
+        """
+        Creates a publisher for a repository configured in Poetry, resolving its
+        URL and credentials the same way `poetry publish` does.
+        """
+        from poetry.utils.authenticator import Authenticator
+        from poetry.utils.helpers import get_cert, get_client_cert
+
+        if not repository_name:
+            url = PYPI_UPLOAD_URL
+            repository_name = "pypi"
+        else:
+            url = poetry.config.get(f"repositories.{repository_name}.url")
+            if url is None:
+                raise PublishError(f"Repository {repository_name} is not defined")
+
+        if not (username and password):
+            authenticator = Authenticator(poetry.config, io)
+            token = authenticator.get_pypi_token(repository_name)
+            if token:
+                username = "__token__"
+                password = token
+            else:
+                auth = authenticator.get_http_auth(repository_name)
+                if auth:
+                    username = auth["username"]
+                    password = auth["password"]
+
+        client_cert = client_cert or get_client_cert(poetry.config, repository_name)
+        if not client_cert:
+            if username is None:
+                username = io.ask("Username:")
+            if username and password is None:
+                password = io.ask_hidden("Password:")
+
+        publisher = cls(url, repository_name, **kwargs)
+        publisher.configure(username, password, cert or get_cert(poetry.config, repository_name), client_cert)
+        return publisher
+
+    def configure(
+        self,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        cert: Optional[Path] = None,
+        client_cert: Optional[Path] = None,
+    ) -> None:
+        self._username = username
+        self._password = password
+        self._cert = cert
+        self._client_cert = client_cert
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def publish(self, projects: List[Tuple["Poetry", "IO"]]) -> Dict[Path, PublishError]:
+        """
+        Uploads the artifacts in each project's dist directory for its current
+        version, and returns the errors of the uploads that failed by file.
+        """
+        uploads: List[Tuple[ProjectUploader, Path, "IO"]] = []
+        errors: Dict[Path, PublishError] = {}
+        repository = "PyPI" if self._repository_name == "pypi" else self._repository_name
+        for poetry, io in projects:
+            uploader = self._uploader(poetry)
+            files = uploader.files
+            if not files:
+                dist_dir = poetry.file.parent / "dist"
+                errors[dist_dir] = PublishError("No files to publish. Run poetry build first.")
+                continue
+
+            package = poetry.package
+            io.write_line(
+                f"Publishing <c1>{package.pretty_name}</c1> (<c2>{package.pretty_version}</c2>) to <info>{repository}</info>"
+            )
+            uploads.extend((uploader, file, io) for file in files)
+
+        def upload(uploader: ProjectUploader, file: Path, io: "IO") -> None:
+            try:
+                outcome = self._upload_file(uploader, file)
+            except PublishError as e:
+                errors[file] = e
+                message = f" - Uploading <c1>{file.name}</c1> <error>FAILED</>"
+            else:
+                if outcome == UPLOADED:
+                    message = f" - Uploaded <c1>{file.name}</c1>"
+                elif outcome == SKIPPED:
+                    message = f" - Skipped <c1>{file.name}</c1>, it already exists"
+                else:
+                    message = f" - Would upload <c1>{file.name}</c1> (dry run)"
+
+            with self._output_lock:
+                io.write_line(message)
+
+        with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+            for future in [executor.submit(upload, *item) for item in uploads]:
+                future.result()
+
+        return errors
+
+    def _uploader(self, poetry: "Poetry") -> ProjectUploader:
+        uploader = ProjectUploader(poetry, self._session, pool_size=self._jobs)
+        if self._session is None:
+            if self._username is not None and self._password is not None:
+                uploader.auth(self._username, self._password)
+
+            self._session = uploader.make_session()
+            if self._cert:
+                self._session.verify = str(self._cert)
+            if self._client_cert:
+                self._session.cert = str(self._client_cert)
+
+        return uploader
+
+    def _upload_file(self, uploader: ProjectUploader, file: Path) -> str:
+        """Uploads a file, and returns whether it was uploaded, skipped, or only a dry run."""
+        error = PublishError(f"Unable to upload {file.name}")
+        for attempt in range(self._retries + 1):
+            if attempt:
+                time.sleep(self._backoff * 2 ** (attempt - 1))
+
+            try:
+                response = uploader.upload_file(self._url, file, self._dry_run)
+            except UploadError as e:
+                # Connection errors are retried, other errors such as redirects
+                # aren't.
+                error = PublishError(str(e))
+                if isinstance(e.__context__, requests.ConnectionError):
+                    continue
+                raise error
+
+            if response is None:
+                return DRY_RUN
+            if 200 <= response.status_code < 300:
+                return UPLOADED
+            if self._skip_existing and is_existing_file_response(response):
+                return SKIPPED
+
+            error = PublishError(f"HTTP Error {response.status_code}: {response.reason}")
+            if response.status_code not in RETRY_STATUS_CODES:
+                break
+
+        raise error
+
+
+def is_existing_file_response(response: requests.Response) -> bool:
+    """
+    Returns whether an upload was rejected because the repository already has
+    the file. Repositories report this differently, these are the responses of
+    PyPI, pypiserver and Artifactory, Nexus, and GitLab.
+    """
+    text = f"{response.reason} {response.text}".lower()
+    if response.status_code == 409:
+        return True
+    if response.status_code == 400:
+        return "already exist" in text or "updating asset" in text or "already been taken" in text
+    if response.status_code == 403:
+        return "overwrite artifact" in text
+    return False
@@ -0,0 +1,89 @@
+import heapq
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Set
+
+
+class Scheduler:
+    """
+    Runs a task for each of a set of workspace projects concurrently, with at
+    most `jobs` tasks running at a time. A project's task is only started once
+    the tasks of all of its dependencies have finished successfully.
+
+    Tasks are started in the order the projects are given whenever more than one
+    is ready, so passing projects in topological order keeps the schedule
+    deterministic. Once a task fails no new tasks are started, and the run ends
+    after the tasks that are still running have finished. With `keep_going`,
+    only the projects that depend on a failed project are skipped instead.
+    """
+
+    _projects: List[str]
+    _dependencies: Dict[str, Set[str]]
+    _jobs: int
+    _keep_going: bool
+
+    def __init__(self, dependencies: Dict[str, List[str]], jobs: Optional[int] = None, keep_going: bool = False):
+        self._projects = list(dependencies)
+        self._dependencies = {name: set(deps) & dependencies.keys() for name, deps in dependencies.items()}
+        self._jobs = jobs or max(len(self._projects), 1)
+        self._keep_going = keep_going
+
+    def run(
+        self, task: Callable[[str], int], on_failure: Optional[Callable[[str, int], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Calls `task` with each project's name, from a pool of worker threads, and
+        returns the exit codes of the tasks that were run by project name, in the
+        order they finished. `on_failure` is called from the scheduling thread as
+        soon as a task fails, e.g. to stop the tasks that are still running.
+        """
+        results: Dict[str, int] = {}
+        waiting = {name: len(deps) for name, deps in self._dependencies.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in self._projects}
+        for name in self._projects:
+            for dep in self._dependencies[name]:
+                dependents[dep].append(name)
+
+        # Heap of (position, name) pairs, so that ready projects are started in the
+        # order they were given.
+        order = {name: i for i, name in enumerate(self._projects)}
+        ready = [(order[name], name) for name in self._projects if waiting[name] == 0]
+        running: Dict["Future[int]", str] = {}
+        failed = False
+
+        executor = ThreadPoolExecutor(max_workers=self._jobs)
+        try:
+            while ready or running:
+                while ready and not failed and len(running) < self._jobs:
+                    _, name = heapq.heappop(ready)
+                    running[executor.submit(task, name)] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    if results[name]:
+                        failed = not self._keep_going
+                        if on_failure:
+                            on_failure(name, results[name])
+                        continue
+
+                    for dependent in dependents[name]:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0:
+                            heapq.heappush(ready, (order[dependent], dependent))
+        finally:
+            # Don't wait for running tasks if the run was interrupted, it's up to
+            # the caller to stop them.
+            executor.shutdown(wait=False)
+
+        return results
+
+
+def parse_jobs(value: str) -> int:
+    """Parses the value of a `--jobs` option."""
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError("--jobs must be a positive integer")
+    return int(value)
@@ -25,6 +25,16 @@ def main():
                 "type": "array",
                 "description": "A list of folders to exclude.",
             },
+            "workers": {
+                "type": "integer",
+                "description": "The number of processes used to parse workspace projects.",
+                "minimum": 1,
+            },
+            "vcs-backend": {
+                "type": "string",
+                "description": "How the git repository is read: by running git commands, or natively in-process.",
+                "enum": ["git", "native"],
+            },
         },
     }
 
@@ -8,10 +8,20 @@ if TYPE_CHECKING:
     from cleo.io.io import IO
 
 
-def detect_vcs(io: "IO") -> VCS:
+def detect_vcs(io: "IO", backend: str = "git") -> VCS:
+    """
+    Finds the git repository containing the current directory. The `native`
+    backend reads the repository in-process, while the `git` backend runs git
+    commands.
+    """
     cwd = Path.cwd()
     for dir_path in [cwd] + list(cwd.parents):
-        if (dir_path / ".git").is_dir():
+        if (dir_path / ".git").exists():
+            if backend == "native":
+                from poetry_workspace.vcs.native import NativeGit
+
+                return NativeGit(dir_path, io)
+
             from poetry_workspace.vcs.git import Git
 
             return Git(dir_path, io)
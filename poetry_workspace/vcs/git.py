@@ -1,35 +1,159 @@
+import functools
 import subprocess
+import tempfile
+import threading
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Callable, Dict, Generator, Iterable, List, Optional, Tuple
 
 from cleo.io.outputs.output import Verbosity
 
 from poetry_workspace.errors import VCSError
 from poetry_workspace.vcs.vcs import VCS
 
+if TYPE_CHECKING:
+    from cleo.io.io import IO
+
 
 class Git(VCS):
+    _batch: Optional["subprocess.Popen[bytes]"]
+    _batch_lock: threading.Lock
+
+    def __init__(self, root: Path, io: "IO"):
+        super().__init__(root, io)
+        self._batch = None
+        self._batch_lock = threading.Lock()
+
     def get_changed_files(self, ref: str) -> List[Path]:
-        commands = ["git", "diff", "--name-only", ref]
+        return list(self.iter_changed_files(ref))
+
+    def iter_changed_files(self, ref: str) -> Generator[Path, None, None]:
+        commands = ["git", "diff", "--name-only", "-z", ref]
         self._io.write_line(f"Running command: <comment>{' '.join(commands)}</>", verbosity=Verbosity.VERY_VERBOSE)
 
-        try:
-            proc = subprocess.run(commands, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        except subprocess.CalledProcessError as e:
-            raise VCSError(f"git command failed:\n\n{e.stderr.decode()}")
+        # Errors are only read once the output has been consumed, so write them to
+        # a file rather than a pipe that could fill up and block git.
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(commands, cwd=self._root, stdout=subprocess.PIPE, stderr=stderr)
+            stdout = proc.stdout
+            assert stdout is not None
+            try:
+                pending = b""
+                for chunk in iter(functools.partial(stdout.read, 64 * 1024), b""):
+                    names = (pending + chunk).split(b"\0")
+                    pending = names.pop()
+                    for name in names:
+                        yield self._root / name.decode()
+            except BaseException:
+                # Including when the caller stops iterating early.
+                proc.kill()
+                proc.wait()
+                raise
+            finally:
+                stdout.close()
 
-        return [self._root / file for file in proc.stdout.decode().split()]
+            if proc.wait():
+                stderr.seek(0)
+                raise VCSError(f"git command failed:\n\n{stderr.read().decode()}")
 
     def read_file(self, ref: str, file: Path) -> str:
-        if file.is_absolute():
-            file = file.relative_to(self._root)
+        content = self.read_files(ref, [file])[file]
+        if content is None:
+            raise VCSError(f"path '{file}' does not exist in '{ref}'")
+        return content
+
+    def read_files(self, ref: str, files: Iterable[Path]) -> Dict[Path, Optional[str]]:
+        # All files are read through one long-lived `git cat-file --batch`
+        # process, instead of running `git show` for every file.
+        with self._batch_lock:
+            if self._read_object(f"{ref}^{{tree}}") is None:
+                raise VCSError(f"unknown revision '{ref}'")
+
+            contents: Dict[Path, Optional[str]] = {}
+            for file in files:
+                if file in contents:
+                    continue
+
+                relative = file.relative_to(self._root) if file.is_absolute() else file
+                found = self._read_object(f"{ref}:{relative.as_posix()}")
+                contents[file] = found[2].decode() if found is not None and found[1] == "blob" else None
+
+            return contents
 
-        commands = ["git", "show", f"{ref}:{file}"]
+    def close(self) -> None:
+        with self._batch_lock:
+            if self._batch is not None:
+                assert self._batch.stdin is not None
+                self._batch.stdin.close()
+                self._batch.wait()
+                self._batch = None
+
+    def resolve_ref(self, ref: str) -> str:
+        with self._batch_lock:
+            found = self._read_object(f"{ref}^{{commit}}")
+        if found is None:
+            raise VCSError(f"unknown revision '{ref}'")
+        return found[0]
+
+    def merge_base(self, ref: str, other: str) -> str:
+        commands = ["git", "merge-base", ref, other]
         self._io.write_line(f"Running command: <comment>{' '.join(commands)}</>", verbosity=Verbosity.VERY_VERBOSE)
 
         try:
-            proc = subprocess.run(commands, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            proc = subprocess.run(commands, cwd=self._root, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         except subprocess.CalledProcessError as e:
+            if not e.stderr:
+                raise VCSError(f"'{ref}' and '{other}' have no common ancestor")
             raise VCSError(f"git command failed:\n\n{e.stderr.decode()}")
 
-        return proc.stdout.decode()
+        return proc.stdout.decode().strip()
+
+    def _read_object(self, name: str) -> Optional[Tuple[str, str, bytes]]:
+        """Returns the object's SHA, type and contents, or None if it doesn't exist."""
+        if "\n" in name:
+            raise VCSError(f"invalid object name {name!r}")
+
+        proc = self._batch_process()
+        stdin, stdout = proc.stdin, proc.stdout
+        assert stdin is not None and stdout is not None
+        try:
+            stdin.write(f"{name}\n".encode())
+            stdin.flush()
+
+            header = stdout.readline().decode()
+            if not header:
+                raise OSError("unexpected end of output")
+            if header.endswith(" missing\n") or header.endswith(" ambiguous\n"):
+                return None
+
+            sha, object_type, size = header.split()
+            content = _read_exactly(stdout.read, int(size) + 1)[:-1]
+        except (OSError, ValueError) as e:
+            self._batch = None
+            proc.kill()
+            raise VCSError(f"git cat-file failed: {e}")
+
+        return sha, object_type, content
+
+    def _batch_process(self) -> "subprocess.Popen[bytes]":
+        if self._batch is None or self._batch.poll() is not None:
+            commands = ["git", "cat-file", "--batch"]
+            self._io.write_line(f"Running command: <comment>{' '.join(commands)}</>", verbosity=Verbosity.VERY_VERBOSE)
+            self._batch = subprocess.Popen(
+                commands,
+                cwd=self._root,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._batch
+
+
+def _read_exactly(read: Callable[[int], bytes], size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = read(size)
+        if not chunk:
+            raise OSError("unexpected end of output")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
@@ -0,0 +1,641 @@
+import heapq
+import itertools
+import os
+import re
+import stat
+import struct
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Generator, Iterable, List, Optional, Tuple
+
+from cleo.io.outputs.output import Verbosity
+
+from poetry_workspace.errors import VCSError
+from poetry_workspace.vcs.git import Git
+from poetry_workspace.vcs.objects import ObjectStore, UnsupportedRepositoryError, hash_object, parse_tree
+
+if TYPE_CHECKING:
+    from cleo.io.io import IO
+
+_TREE_MODE = 0o040000
+_SYMLINK_MODE = 0o120000
+_GITLINK_MODE = 0o160000
+
+_HEX_RE = re.compile(r"^[0-9a-f]{4,40}$")
+_SUFFIX_RE = re.compile(r"~(\d*)|\^\{(\w*)\}|\^(\d*)")
+
+# The order in which git tries to resolve a short reference name, see
+# gitrevisions(7).
+_REF_RULES = ["{}", "refs/{}", "refs/tags/{}", "refs/heads/{}", "refs/remotes/{}", "refs/remotes/{}/HEAD"]
+
+# Index entries and their flags, see gitformat-index(5).
+_INDEX_ENTRY = struct.Struct(">10I20sH")
+_INDEX_EXTENDED = 0x4000
+_INDEX_SKIP_WORKTREE = 0x4000
+
+
+class IndexEntry:
+    mode: int
+    sha: bytes
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+    inode: int
+    stage: int
+    skip_worktree: bool
+
+    def __init__(
+        self,
+        mode: int,
+        sha: bytes,
+        size: int,
+        mtime_ns: int,
+        ctime_ns: int,
+        inode: int,
+        stage: int,
+        skip_worktree: bool,
+    ):
+        self.mode = mode
+        self.sha = sha
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.ctime_ns = ctime_ns
+        self.inode = inode
+        self.stage = stage
+        self.skip_worktree = skip_worktree
+
+
+class NativeGit(Git):
+    """
+    Git backend that reads the repository's refs, index and object database
+    in-process, instead of running a git command for each query. Tree diffs
+    skip subtrees whose IDs are unchanged, and comparisons with the working
+    tree only hash files whose stat information differs from the index.
+
+    Features it doesn't understand, such as SHA-256 repositories, reftables,
+    sparse indexes, revision syntax beyond `~`, `^` and `^{type}`, and working
+    trees with content filters or line ending conversion, are handed to the
+    subprocess based `Git` backend.
+
+    Unlike `git diff`, renames are not detected, so both the old and the new
+    path of a renamed file are reported as changed.
+    """
+
+    _git_dir: Path
+    _common_dir: Path
+    _objects: Optional[ObjectStore]
+    _trees: Dict[bytes, Dict[str, Tuple[int, bytes]]]
+    _commits: Dict[bytes, Tuple[bytes, List[bytes], int]]
+    _lock: threading.RLock
+
+    def __init__(self, root: Path, io: "IO"):
+        super().__init__(root, io)
+        self._git_dir = find_git_dir(self._root)
+        self._common_dir = self._git_dir
+        try:
+            self._common_dir = (self._git_dir / (self._git_dir / "commondir").read_text().strip()).resolve()
+        except OSError:
+            pass
+
+        self._objects = None
+        self._trees = {}
+        self._commits = {}
+        self._lock = threading.RLock()
+
+    def iter_changed_files(self, ref: str) -> Generator[Path, None, None]:
+        try:
+            with self._lock:
+                files = self._changed_files(ref)
+        except UnsupportedRepositoryError as e:
+            self._write_fallback(e)
+            yield from super().iter_changed_files(ref)
+            return
+
+        for file in files:
+            yield self._root / file
+
+    def read_files(self, ref: str, files: Iterable[Path]) -> Dict[Path, Optional[str]]:
+        files = list(files)
+        try:
+            with self._lock:
+                tree = self._peel(self._resolve(ref), "tree")
+                contents: Dict[Path, Optional[str]] = {}
+                for file in files:
+                    relative = file.relative_to(self._root) if file.is_absolute() else file
+                    entry = self._find_entry(tree, relative.as_posix())
+                    if entry is None or entry[0] in (_TREE_MODE, _GITLINK_MODE):
+                        contents[file] = None
+                    else:
+                        contents[file] = self._read(entry[1], "blob").decode()
+                return contents
+        except UnsupportedRepositoryError as e:
+            self._write_fallback(e)
+            return super().read_files(ref, files)
+
+    def resolve_ref(self, ref: str) -> str:
+        try:
+            with self._lock:
+                return self._peel(self._resolve(ref), "commit").hex()
+        except UnsupportedRepositoryError as e:
+            self._write_fallback(e)
+            return super().resolve_ref(ref)
+
+    def merge_base(self, ref: str, other: str) -> str:
+        try:
+            with self._lock:
+                base = self._merge_base(
+                    self._peel(self._resolve(ref), "commit"), self._peel(self._resolve(other), "commit")
+                )
+        except UnsupportedRepositoryError as e:
+            self._write_fallback(e)
+            return super().merge_base(ref, other)
+
+        if base is None:
+            raise VCSError(f"'{ref}' and '{other}' have no common ancestor")
+        return base.hex()
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            if self._objects is not None:
+                self._objects.close()
+                self._objects = None
+            self._trees.clear()
+            self._commits.clear()
+
+    def _changed_files(self, ref: str) -> List[str]:
+        if "..." in ref:
+            left, right = ref.split("...", 1)
+            head = self._peel(self._resolve(right or "HEAD"), "commit")
+            base = self._merge_base(self._peel(self._resolve(left or "HEAD"), "commit"), head)
+            if base is None:
+                raise VCSError(f"'{left}' and '{right}' have no common ancestor")
+            return self._diff_commits(base, head)
+
+        if ".." in ref:
+            left, right = ref.split("..", 1)
+            return self._diff_commits(
+                self._peel(self._resolve(left or "HEAD"), "commit"),
+                self._peel(self._resolve(right or "HEAD"), "commit"),
+            )
+
+        return self._diff_working_tree(self._peel(self._resolve(ref), "tree"))
+
+    def _diff_commits(self, old: bytes, new: bytes) -> List[str]:
+        changed: List[str] = []
+        self._diff_trees(self._peel(old, "tree"), self._peel(new, "tree"), "", changed)
+        return sorted(changed, key=_path_key)
+
+    def _diff_trees(self, old: Optional[bytes], new: Optional[bytes], prefix: str, changed: List[str]) -> None:
+        if old == new:
+            return
+
+        old_entries = self._tree(old) if old else {}
+        new_entries = self._tree(new) if new else {}
+        for name in old_entries.keys() | new_entries.keys():
+            old_entry = old_entries.get(name)
+            new_entry = new_entries.get(name)
+            if old_entry == new_entry:
+                continue
+
+            path = prefix + name
+            old_tree = old_entry[1] if old_entry is not None and old_entry[0] == _TREE_MODE else None
+            new_tree = new_entry[1] if new_entry is not None and new_entry[0] == _TREE_MODE else None
+            if old_tree is not None or new_tree is not None:
+                self._diff_trees(old_tree, new_tree, path + "/", changed)
+            if (old_entry is not None and old_tree is None) or (new_entry is not None and new_tree is None):
+                changed.append(path)
+
+    def _diff_working_tree(self, tree: bytes) -> List[str]:
+        """
+        Lists the files that differ between a tree and the working tree, for the
+        files tracked by either the tree or the index, like `git diff <tree>`.
+        """
+        config = self._read_config()
+        if re.search(r"^\s*autocrlf\s*=\s*(true|input)", config, re.IGNORECASE | re.MULTILINE):
+            raise UnsupportedRepositoryError("core.autocrlf is set")
+        if re.search(r"^\s*attributesfile\s*=", config, re.IGNORECASE | re.MULTILINE):
+            raise UnsupportedRepositoryError("core.attributesFile is set")
+        trust_mode = not re.search(r"^\s*filemode\s*=\s*false", config, re.IGNORECASE | re.MULTILINE)
+        trust_ctime = not re.search(r"^\s*trustctime\s*=\s*false", config, re.IGNORECASE | re.MULTILINE)
+
+        index, index_mtime_ns = self._read_index()
+        xdg_config_home = os.environ.get("XDG_CONFIG_HOME") or str(Path.home() / ".config")
+        attributes_files = [self._common_dir / "info" / "attributes", Path(xdg_config_home) / "git" / "attributes"]
+        if any(path.exists() for path in attributes_files) or any(
+            path == ".gitattributes" or path.endswith("/.gitattributes") for path in index
+        ):
+            raise UnsupportedRepositoryError("the repository uses gitattributes")
+
+        tree_entries: Dict[str, Tuple[int, bytes]] = {}
+        self._flatten(tree, "", tree_entries)
+
+        changed = [path for path in tree_entries if path not in index]
+        for path, entry in index.items():
+            tree_entry = tree_entries.get(path)
+            if entry.stage != 0:
+                changed.append(path)
+                continue
+
+            if tree_entry is None:
+                # Files added to the index and then deleted don't exist on either side.
+                if (
+                    entry.skip_worktree
+                    or entry.mode == _GITLINK_MODE
+                    or os.path.lexists(os.path.join(self._root, path))
+                ):
+                    changed.append(path)
+                continue
+
+            if entry.mode == _GITLINK_MODE or entry.skip_worktree:
+                # The working tree isn't compared for submodules and files
+                # excluded by a sparse checkout.
+                if (entry.mode, entry.sha) != tree_entry:
+                    changed.append(path)
+                continue
+
+            if not self._matches_working_tree(path, entry, tree_entry, index_mtime_ns, trust_mode, trust_ctime):
+                changed.append(path)
+
+        return sorted(changed, key=_path_key)
+
+    def _matches_working_tree(
+        self,
+        path: str,
+        entry: IndexEntry,
+        tree_entry: Tuple[int, bytes],
+        index_mtime_ns: int,
+        trust_mode: bool,
+        trust_ctime: bool,
+    ) -> bool:
+        # Plain strings rather than Path objects, as this runs for every file.
+        file = os.path.join(self._root, path)
+        try:
+            st = os.lstat(file)
+        except OSError:
+            return False
+
+        if stat.S_ISLNK(st.st_mode):
+            mode = _SYMLINK_MODE
+        elif stat.S_ISREG(st.st_mode):
+            mode = 0o100755 if trust_mode and st.st_mode & 0o100 else 0o100644
+        else:
+            return False
+
+        tree_mode, tree_sha = tree_entry
+        if not trust_mode and mode == 0o100644 and stat.S_ISREG(entry.mode):
+            mode = entry.mode
+        if mode != tree_mode:
+            return False
+
+        # The index's object ID can be trusted while the file's stat information
+        # is unchanged. Files that were modified in the same timestamp tick as the
+        # index was written may have changed without their stat information
+        # changing, so they're hashed like git does.
+        if (
+            entry.size == st.st_size & 0xFFFFFFFF
+            and _same_time(entry.mtime_ns, st.st_mtime_ns)
+            and (not trust_ctime or _same_time(entry.ctime_ns, st.st_ctime_ns))
+            and entry.inode in (0, st.st_ino & 0xFFFFFFFF)
+            and entry.mtime_ns < index_mtime_ns
+        ):
+            return entry.sha == tree_sha
+
+        if mode == _SYMLINK_MODE:
+            content = os.fsencode(os.readlink(file))
+        else:
+            with open(file, "rb") as f:
+                content = f.read()
+        return hash_object("blob", content) == tree_sha
+
+    def _read_index(self) -> Tuple[Dict[str, IndexEntry], int]:
+        index_path = self._git_dir / "index"
+        try:
+            data = index_path.read_bytes()
+            index_mtime_ns = index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}, 0
+
+        signature, version, count = struct.unpack(">4sII", data[:12])
+        if signature != b"DIRC" or version not in (2, 3, 4):
+            raise UnsupportedRepositoryError(f"unsupported index version {version}")
+
+        entries: Dict[str, IndexEntry] = {}
+        pos = 12
+        previous_name = b""
+        for _ in range(count):
+            (ctime_s, ctime_ns, mtime_s, mtime_ns, _, inode, mode, _, _, size, sha, flags) = _INDEX_ENTRY.unpack_from(
+                data, pos
+            )
+            name_start = pos + 62
+
+            extended_flags = 0
+            if flags & _INDEX_EXTENDED and version >= 3:
+                (extended_flags,) = struct.unpack_from(">H", data, name_start)
+                name_start += 2
+
+            if version == 4:
+                # Names are prefix compressed against the previous entry's name.
+                strip, name_start = _read_offset(data, name_start)
+                end = data.index(b"\0", name_start)
+                name = previous_name[: len(previous_name) - strip] + data[name_start:end]
+                pos = end + 1
+            else:
+                end = data.index(b"\0", name_start)
+                name = data[name_start:end]
+                pos += (end - pos + 8) & ~7
+
+            if mode & 0o170000 == _TREE_MODE:
+                raise UnsupportedRepositoryError("sparse indexes are not supported")
+
+            previous_name = name
+            path = name.decode("utf-8", "surrogateescape")
+            entry = IndexEntry(
+                mode=mode,
+                sha=sha,
+                size=size,
+                mtime_ns=mtime_s * 1_000_000_000 + mtime_ns,
+                ctime_ns=ctime_s * 1_000_000_000 + ctime_ns,
+                inode=inode,
+                stage=(flags >> 12) & 3,
+                skip_worktree=bool(extended_flags & _INDEX_SKIP_WORKTREE),
+            )
+            if path not in entries or entry.stage != 0:
+                entries[path] = entry
+
+        return entries, index_mtime_ns
+
+    def _resolve(self, ref: str) -> bytes:
+        """Resolves a revision to an object ID, supporting `~n`, `^n` and `^{type}` suffixes."""
+        name, suffixes = ref, ""
+        match = re.search(r"[~^]", ref)
+        if match:
+            name, suffixes = ref[: match.start()], ref[match.start() :]
+
+        if not name or ":" in name or "@{" in name or name.startswith("-"):
+            raise UnsupportedRepositoryError(f"unsupported revision '{ref}'")
+
+        sha = self._resolve_name("HEAD" if name == "@" else name, ref)
+        pos = 0
+        while pos < len(suffixes):
+            match = _SUFFIX_RE.match(suffixes, pos)
+            if not match:
+                raise UnsupportedRepositoryError(f"unsupported revision '{ref}'")
+            pos = match.end()
+
+            ancestors, peel_type, parent = match.groups()
+            if ancestors is not None:
+                for _ in range(int(ancestors or 1)):
+                    sha = self._parent(sha, 1, ref)
+            elif peel_type is not None:
+                if peel_type == "":
+                    sha = self._peel(sha, None)
+                elif peel_type in ("commit", "tree", "blob", "tag"):
+                    sha = self._peel(sha, peel_type)
+                else:
+                    raise UnsupportedRepositoryError(f"unsupported revision '{ref}'")
+            else:
+                index = int(parent or 1)
+                if index:
+                    sha = self._parent(sha, index, ref)
+                else:
+                    sha = self._peel(sha, "commit")
+
+        return sha
+
+    def _resolve_name(self, name: str, ref: str) -> bytes:
+        if len(name) == 40 and _HEX_RE.match(name):
+            return bytes.fromhex(name)
+
+        for rule in _REF_RULES:
+            if rule == "{}" and not (name.startswith("refs/") or re.match(r"^[A-Z_]+$", name)):
+                continue
+            sha = self._read_ref(rule.format(name))
+            if sha is not None:
+                return sha
+
+        if _HEX_RE.match(name):
+            matches = self._get_objects().expand(name)
+            if len(matches) == 1:
+                return matches[0]
+            if len(matches) > 1:
+                raise VCSError(f"short object ID {name} is ambiguous")
+
+        # Let git report unknown revisions, it also understands names that aren't
+        # resolved here.
+        raise UnsupportedRepositoryError(f"unknown revision '{ref}'")
+
+    def _read_ref(self, name: str) -> Optional[bytes]:
+        for _ in range(10):
+            ref_dir = self._common_dir if name.startswith("refs/") else self._git_dir
+            content: Optional[str]
+            try:
+                content = (ref_dir / name).read_text().strip()
+            except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+                content = self._read_packed_refs().get(name)
+            if not content:
+                return None
+
+            if content.startswith("ref:"):
+                name = content[4:].strip()
+                continue
+
+            if not _HEX_RE.match(content[:40]) or len(content) < 40:
+                raise UnsupportedRepositoryError(f"unsupported ref {name}")
+            return bytes.fromhex(content[:40])
+
+        raise VCSError(f"too many levels of symbolic refs at {name}")
+
+    def _read_packed_refs(self) -> Dict[str, str]:
+        refs: Dict[str, str] = {}
+        try:
+            lines = (self._common_dir / "packed-refs").read_text().splitlines()
+        except FileNotFoundError:
+            return refs
+
+        for line in lines:
+            if line and not line.startswith(("#", "^")):
+                sha, _, name = line.partition(" ")
+                refs[name.strip()] = sha
+        return refs
+
+    def _read_config(self) -> str:
+        paths = [self._common_dir / "config", Path.home() / ".gitconfig"]
+        xdg_config_home = os.environ.get("XDG_CONFIG_HOME") or str(Path.home() / ".config")
+        paths.append(Path(xdg_config_home) / "git" / "config")
+
+        contents = []
+        for path in paths:
+            try:
+                contents.append(path.read_text())
+            except OSError:
+                pass
+        return "\n".join(contents)
+
+    def _get_objects(self) -> ObjectStore:
+        if self._objects is None:
+            config = self._read_config()
+            if re.search(r"^\s*(objectformat|refstorage)\s*=", config, re.IGNORECASE | re.MULTILINE):
+                raise UnsupportedRepositoryError("unsupported repository format extension")
+            if (self._common_dir / "shallow").exists():
+                raise UnsupportedRepositoryError("shallow repositories are not supported")
+
+            self._objects = ObjectStore(self._common_dir / "objects")
+        return self._objects
+
+    def _read(self, sha: bytes, expected_type: Optional[str] = None) -> bytes:
+        object_type, content = self._read_object_data(sha)
+        if expected_type is not None and object_type != expected_type:
+            raise VCSError(f"object {sha.hex()} is a {object_type}, not a {expected_type}")
+        return content
+
+    def _read_object_data(self, sha: bytes) -> Tuple[str, bytes]:
+        try:
+            return self._get_objects().read(sha)
+        except KeyError:
+            # The object may be fetched on demand from a promisor remote.
+            raise UnsupportedRepositoryError(f"object {sha.hex()} not found")
+
+    def _peel(self, sha: bytes, target_type: Optional[str]) -> bytes:
+        """Follows tags, and commits to their trees, until reaching an object of the target type."""
+        while True:
+            object_type, content = self._read_object_data(sha)
+            if object_type == target_type or (target_type is None and object_type != "tag"):
+                return sha
+            if object_type == "tag":
+                sha = bytes.fromhex(content[7:47].decode())
+            elif object_type == "commit" and target_type == "tree":
+                sha = self._commit(sha)[0]
+            else:
+                raise VCSError(f"object {sha.hex()} is a {object_type}, not a {target_type}")
+
+    def _parent(self, sha: bytes, index: int, ref: str) -> bytes:
+        parents = self._commit(self._peel(sha, "commit"))[1]
+        if len(parents) < index:
+            raise VCSError(f"unknown revision '{ref}'")
+        return parents[index - 1]
+
+    def _commit(self, sha: bytes) -> Tuple[bytes, List[bytes], int]:
+        """Returns a commit's tree, parents and commit time."""
+        if sha not in self._commits:
+            content = self._read(sha, "commit")
+            headers = content[: content.find(b"\n\n")].split(b"\n")
+
+            tree = b""
+            parents = []
+            timestamp = 0
+            for header in headers:
+                if header.startswith(b"tree "):
+                    tree = bytes.fromhex(header[5:].decode())
+                elif header.startswith(b"parent "):
+                    parents.append(bytes.fromhex(header[7:].decode()))
+                elif header.startswith(b"committer "):
+                    timestamp = int(header.rsplit(b" ", 2)[1])
+            self._commits[sha] = (tree, parents, timestamp)
+        return self._commits[sha]
+
+    def _merge_base(self, one: bytes, two: bytes) -> Optional[bytes]:
+        """
+        Finds the best common ancestor of two commits, walking back from both by
+        commit time the same way as `git merge-base`, and stopping once every
+        commit left to visit is an ancestor of a common ancestor already found.
+        If there are several best common ancestors, the most recent is returned.
+        """
+        parent_one, parent_two, stale, result = 1, 2, 4, 8
+        flags: Dict[bytes, int] = {one: parent_one}
+        flags[two] = flags.get(two, 0) | parent_two
+
+        # Commits with the same time are visited in the order they were queued.
+        counter = itertools.count()
+        queue = [(-self._commit(sha)[2], next(counter), sha) for sha in dict.fromkeys([one, two])]
+        heapq.heapify(queue)
+        found: List[bytes] = []
+        while any(not flags[sha] & stale for _, _, sha in queue):
+            _, _, sha = heapq.heappop(queue)
+            commit_flags = flags[sha] & (parent_one | parent_two | stale)
+            if commit_flags == parent_one | parent_two:
+                if not flags[sha] & result:
+                    flags[sha] |= result
+                    found.append(sha)
+                commit_flags |= stale
+
+            for parent in self._commit(sha)[1]:
+                if flags.get(parent, 0) & commit_flags == commit_flags:
+                    continue
+                flags[parent] = flags.get(parent, 0) | commit_flags
+                heapq.heappush(queue, (-self._commit(parent)[2], next(counter), parent))
+
+        # Commit times aren't always in order, so a common ancestor of another one
+        # may have been found first.
+        if len(found) > 1:
+            found = [sha for sha in found if not any(self._is_ancestor(sha, other) for other in found if other != sha)]
+        return found[0] if found else None
+
+    def _is_ancestor(self, ancestor: bytes, sha: bytes) -> bool:
+        seen = {sha}
+        pending = [sha]
+        while pending:
+            for parent in self._commit(pending.pop())[1]:
+                if parent == ancestor:
+                    return True
+                if parent not in seen:
+                    seen.add(parent)
+                    pending.append(parent)
+        return False
+
+    def _tree(self, sha: bytes) -> Dict[str, Tuple[int, bytes]]:
+        if sha not in self._trees:
+            self._trees[sha] = parse_tree(self._read(sha, "tree"))
+        return self._trees[sha]
+
+    def _flatten(self, tree: bytes, prefix: str, entries: Dict[str, Tuple[int, bytes]]) -> None:
+        for name, (mode, sha) in self._tree(tree).items():
+            if mode == _TREE_MODE:
+                self._flatten(sha, prefix + name + "/", entries)
+            else:
+                entries[prefix + name] = (mode, sha)
+
+    def _find_entry(self, tree: bytes, path: str) -> Optional[Tuple[int, bytes]]:
+        entry: Optional[Tuple[int, bytes]] = (_TREE_MODE, tree)
+        for part in path.split("/"):
+            if entry is None or entry[0] != _TREE_MODE:
+                return None
+            entry = self._tree(entry[1]).get(part)
+        return entry
+
+    def _write_fallback(self, error: UnsupportedRepositoryError) -> None:
+        self._io.write_line(f"Falling back to the git command: {error}", verbosity=Verbosity.VERY_VERBOSE)
+
+
+def find_git_dir(root: Path) -> Path:
+    """Returns a repository's git directory, following `.git` files used by worktrees and submodules."""
+    dot_git = root / ".git"
+    if dot_git.is_file():
+        content = dot_git.read_text().strip()
+        if not content.startswith("gitdir:"):
+            raise VCSError(f"invalid .git file {dot_git}")
+        return (root / content[len("gitdir:") :].strip()).resolve()
+    return dot_git
+
+
+def _path_key(path: str) -> bytes:
+    # Git lists paths in byte order.
+    return path.encode("utf-8", "surrogateescape")
+
+
+def _same_time(index_time_ns: int, time_ns: int) -> bool:
+    # Git may not record sub-second times.
+    index_seconds, index_ns = divmod(index_time_ns, 1_000_000_000)
+    seconds, ns = divmod(time_ns, 1_000_000_000)
+    return index_seconds == seconds & 0xFFFFFFFF and (index_ns == 0 or index_ns == ns)
+
+
+def _read_offset(data: bytes, pos: int) -> Tuple[int, int]:
+    c = data[pos]
+    pos += 1
+    value = c & 0x7F
+    while c & 0x80:
+        c = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (c & 0x7F)
+    return value, pos
@@ -0,0 +1,372 @@
+import hashlib
+import mmap
+import struct
+import zlib
+from bisect import bisect_left
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union, overload
+
+from poetry_workspace.errors import VCSError
+
+# Pack object types, see gitformat-pack(5).
+_OBJ_COMMIT = 1
+_OBJ_TREE = 2
+_OBJ_BLOB = 3
+_OBJ_TAG = 4
+_OBJ_OFS_DELTA = 6
+_OBJ_REF_DELTA = 7
+
+_TYPE_NAMES = {_OBJ_COMMIT: "commit", _OBJ_TREE: "tree", _OBJ_BLOB: "blob", _OBJ_TAG: "tag"}
+
+# Objects, including delta bases, are cached up to this total size, as walking
+# trees reads the same objects many times.
+_CACHE_MAX_SIZE = 32 * 1024 * 1024
+
+
+class UnsupportedRepositoryError(VCSError):
+    """Raised for repository features that can't be handled without running git."""
+
+
+class PackIndex:
+    """A version 2 pack index file, mapped into memory."""
+
+    _data: mmap.mmap
+    _fanout: Tuple[int, ...]
+    _count: int
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._data[:4] != b"\377tOc" or struct.unpack(">I", self._data[4:8])[0] != 2:
+            raise UnsupportedRepositoryError(f"unsupported pack index {path}")
+
+        self._fanout = struct.unpack(">256I", self._data[8 : 8 + 1024])
+        self._count = self._fanout[255]
+
+    def find(self, sha: bytes) -> Optional[int]:
+        """Returns the offset of an object in the pack file."""
+        lo = self._fanout[sha[0] - 1] if sha[0] else 0
+        hi = self._fanout[sha[0]]
+        i = bisect_left(_NameView(self._data, self._count), sha, lo, hi)
+        if i < hi and self._name(i) == sha:
+            return self._offset(i)
+        return None
+
+    def find_prefix(self, prefix: bytes, prefix_len: int) -> List[bytes]:
+        """Returns the IDs of objects whose hex ID starts with the first `prefix_len` digits of `prefix`."""
+        matches = []
+        hex_prefix = prefix.hex()[:prefix_len]
+        i = bisect_left(_NameView(self._data, self._count), prefix)
+        while i < self._count:
+            name = self._name(i)
+            if not name.hex().startswith(hex_prefix):
+                break
+            matches.append(name)
+            i += 1
+        return matches
+
+    def close(self) -> None:
+        self._data.close()
+
+    def _name(self, i: int) -> bytes:
+        start = 8 + 1024 + 20 * i
+        return self._data[start : start + 20]
+
+    def _offset(self, i: int) -> int:
+        offsets = 8 + 1024 + 24 * self._count
+        offset = struct.unpack(">I", self._data[offsets + 4 * i : offsets + 4 * i + 4])[0]
+        if offset & 0x80000000:
+            large = offsets + 4 * self._count + 8 * (offset & 0x7FFFFFFF)
+            offset = struct.unpack(">Q", self._data[large : large + 8])[0]
+        return offset
+
+
+class _NameView(Sequence[bytes]):
+    """A sequence view of the object IDs in a pack index, for binary searching."""
+
+    def __init__(self, data: mmap.mmap, count: int):
+        self._data = data
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, i: int) -> bytes:
+        ...
+
+    @overload
+    def __getitem__(self, i: slice) -> Sequence[bytes]:
+        ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[bytes, Sequence[bytes]]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        start = 8 + 1024 + 20 * i
+        return self._data[start : start + 20]
+
+
+class Pack:
+    """A pack file, mapped into memory, with its index."""
+
+    index: PackIndex
+    _data: mmap.mmap
+
+    def __init__(self, path: Path):
+        self.index = PackIndex(path.with_suffix(".idx"))
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._data[:4] != b"PACK" or struct.unpack(">I", self._data[4:8])[0] not in (2, 3):
+            raise UnsupportedRepositoryError(f"unsupported pack file {path}")
+
+    def read(self, offset: int, store: "ObjectStore") -> Tuple[str, bytes]:
+        data = self._data
+        c = data[offset]
+        pos = offset + 1
+        object_type = (c >> 4) & 7
+        size = c & 15
+        shift = 4
+        while c & 0x80:
+            c = data[pos]
+            pos += 1
+            size |= (c & 0x7F) << shift
+            shift += 7
+
+        if object_type == _OBJ_OFS_DELTA:
+            c = data[pos]
+            pos += 1
+            relative = c & 0x7F
+            while c & 0x80:
+                c = data[pos]
+                pos += 1
+                relative = ((relative + 1) << 7) | (c & 0x7F)
+            base_type, base = store.read_packed(self, offset - relative)
+            return base_type, apply_delta(base, self._inflate(pos, size))
+
+        if object_type == _OBJ_REF_DELTA:
+            base_type, base = store.read(data[pos : pos + 20])
+            return base_type, apply_delta(base, self._inflate(pos + 20, size))
+
+        if object_type not in _TYPE_NAMES:
+            raise VCSError(f"invalid object type {object_type} in pack")
+        return _TYPE_NAMES[object_type], self._inflate(pos, size)
+
+    def close(self) -> None:
+        self.index.close()
+        self._data.close()
+
+    def _inflate(self, pos: int, size: int) -> bytes:
+        # Feed the compressed data in chunks, as slicing the rest of the pack
+        # would copy it.
+        decompressor = zlib.decompressobj()
+        chunk_size = max(size, 4096)
+        chunks = []
+        while not decompressor.eof:
+            chunk = self._data[pos : pos + chunk_size]
+            if not chunk:
+                raise VCSError("truncated object in pack")
+            chunks.append(decompressor.decompress(chunk))
+            pos += chunk_size
+        return b"".join(chunks)
+
+
+class ObjectStore:
+    """
+    Reads objects from a repository's object directory: loose objects are
+    decompressed from their own files and packed objects are read from memory
+    mapped pack files, resolving deltas against their bases.
+    """
+
+    _dirs: List[Path]
+    _packs: Optional[List[Pack]]
+    _cache: "OrderedDict[bytes, Tuple[str, bytes]]"
+    _cache_size: int
+
+    def __init__(self, objects_dir: Path):
+        self._dirs = [objects_dir] + _read_alternates(objects_dir)
+        self._packs = None
+        self._cache = OrderedDict()
+        self._cache_size = 0
+
+    def read(self, sha: bytes) -> Tuple[str, bytes]:
+        """Returns the type and contents of an object, raising KeyError if it doesn't exist."""
+        cached = self._cache.get(sha)
+        if cached is not None:
+            self._cache.move_to_end(sha)
+            return cached
+
+        found = self._read_loose(sha)
+        if found is None:
+            found = self._read_from_packs(sha)
+        if found is None:
+            # Objects may have been packed since the packs were listed.
+            self._reload_packs()
+            found = self._read_from_packs(sha)
+        if found is None:
+            raise KeyError(sha.hex())
+
+        self._remember(sha, found)
+        return found
+
+    def read_packed(self, pack: Pack, offset: int) -> Tuple[str, bytes]:
+        key = b"%d:%d" % (id(pack), offset)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        found = pack.read(offset, self)
+        self._remember(key, found)
+        return found
+
+    def expand(self, hex_prefix: str) -> List[bytes]:
+        """Returns the IDs of the objects whose hex ID starts with the given prefix."""
+        matches = set()
+        for objects_dir in self._dirs:
+            try:
+                names = [entry.name for entry in (objects_dir / hex_prefix[:2]).iterdir()]
+            except OSError:
+                names = []
+            for name in names:
+                if (hex_prefix[:2] + name).startswith(hex_prefix) and len(name) == 38:
+                    matches.add(bytes.fromhex(hex_prefix[:2] + name))
+
+        prefix = bytes.fromhex(hex_prefix.ljust(40, "0"))
+        for pack in self._get_packs():
+            matches.update(pack.index.find_prefix(prefix, len(hex_prefix)))
+        return sorted(matches)
+
+    def close(self) -> None:
+        for pack in self._packs or []:
+            pack.close()
+        self._packs = None
+        self._cache.clear()
+        self._cache_size = 0
+
+    def _read_loose(self, sha: bytes) -> Optional[Tuple[str, bytes]]:
+        hex_sha = sha.hex()
+        for objects_dir in self._dirs:
+            try:
+                raw = zlib.decompress((objects_dir / hex_sha[:2] / hex_sha[2:]).read_bytes())
+            except FileNotFoundError:
+                continue
+
+            header, _, content = raw.partition(b"\0")
+            object_type, _, _ = header.partition(b" ")
+            return object_type.decode(), content
+        return None
+
+    def _read_from_packs(self, sha: bytes) -> Optional[Tuple[str, bytes]]:
+        for pack in self._get_packs():
+            offset = pack.index.find(sha)
+            if offset is not None:
+                return self.read_packed(pack, offset)
+        return None
+
+    def _get_packs(self) -> List[Pack]:
+        if self._packs is None:
+            self._packs = []
+            for objects_dir in self._dirs:
+                self._packs.extend(Pack(path) for path in sorted((objects_dir / "pack").glob("*.pack")))
+        return self._packs
+
+    def _reload_packs(self) -> None:
+        for pack in self._packs or []:
+            pack.close()
+        self._packs = None
+        self._cache.clear()
+        self._cache_size = 0
+
+    def _remember(self, key: bytes, value: Tuple[str, bytes]) -> None:
+        self._cache[key] = value
+        self._cache_size += len(value[1])
+        while self._cache_size > _CACHE_MAX_SIZE and len(self._cache) > 1:
+            _, (_, evicted) = self._cache.popitem(last=False)
+            self._cache_size -= len(evicted)
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Reconstructs an object from its delta base and a delta, see gitformat-pack(5)."""
+    base_size, pos = _read_size(delta, 0)
+    result_size, pos = _read_size(delta, pos)
+    if base_size != len(base):
+        raise VCSError("delta base size mismatch")
+
+    result = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            # Copy a range of the base.
+            offset = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            size = 0
+            for i in range(3):
+                if op & (1 << (4 + i)):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            result += base[offset : offset + (size or 0x10000)]
+        elif op:
+            # Insert new data.
+            result += delta[pos : pos + op]
+            pos += op
+        else:
+            raise VCSError("invalid delta instruction")
+
+    if len(result) != result_size:
+        raise VCSError("delta result size mismatch")
+    return bytes(result)
+
+
+def _read_size(data: bytes, pos: int) -> Tuple[int, int]:
+    size = 0
+    shift = 0
+    while True:
+        c = data[pos]
+        pos += 1
+        size |= (c & 0x7F) << shift
+        shift += 7
+        if not c & 0x80:
+            return size, pos
+
+
+def _read_alternates(objects_dir: Path) -> List[Path]:
+    try:
+        lines = (objects_dir / "info" / "alternates").read_text().splitlines()
+    except OSError:
+        return []
+
+    dirs = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            dirs.append((objects_dir / line).resolve())
+    return dirs
+
+
+def hash_object(object_type: str, content: bytes) -> bytes:
+    return hashlib.sha1(f"{object_type} {len(content)}\0".encode() + content).digest()
+
+
+def parse_tree(content: bytes) -> Dict[str, Tuple[int, bytes]]:
+    """Returns a tree's entries by name, with their modes and object IDs."""
+    entries = {}
+    pos = 0
+    while pos < len(content):
+        space = content.index(b" ", pos)
+        nul = content.index(b"\0", space)
+        name = content[space + 1 : nul].decode("utf-8", "surrogateescape")
+        entries[name] = (int(content[pos:space], 8), content[nul + 1 : nul + 21])
+        pos = nul + 21
+    return entries
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
 
 if TYPE_CHECKING:
     from cleo.io.io import IO
@@ -17,5 +17,28 @@ class VCS:
     def get_changed_files(self, ref: str) -> List[Path]:
         raise NotImplementedError()
 
+    def iter_changed_files(self, ref: str) -> Iterator[Path]:
+        """Yields the changed files as they're found, without waiting for the full list."""
+        return iter(self.get_changed_files(ref))
+
     def read_file(self, ref: str, file: Path) -> str:
         raise NotImplementedError()
+
+    def read_files(self, ref: str, files: Iterable[Path]) -> Dict[Path, Optional[str]]:
+        """
+        Reads multiple files at a reference at once. Returns the contents of each
+        file keyed by the given path, or None for files that don't exist at that
+        reference.
+        """
+        raise NotImplementedError()
+
+    def resolve_ref(self, ref: str) -> str:
+        """Returns the ID of the commit that a reference points to."""
+        raise NotImplementedError()
+
+    def merge_base(self, ref: str, other: str) -> str:
+        """Returns the ID of the best common ancestor of two references."""
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
@@ -1,101 +1,175 @@
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from glob import glob
 from pathlib import Path
-from typing import TYPE_CHECKING, List, Optional, Set
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set
 
-from poetry.core import json
+from poetry.core import json as poetry_json
 from poetry.core.packages.directory_dependency import DirectoryDependency
+from poetry.core.pyproject.toml import PyProjectTOML
+from poetry.core.utils.helpers import canonicalize_name
 from poetry.factory import Factory
+from poetry.packages.locker import Locker
 
+from poetry_workspace.cache import WorkspaceCache
 from poetry_workspace.errors import WorkspaceError
 from poetry_workspace.graph import DependencyGraph
+from poetry_workspace.project import Project
 
 if TYPE_CHECKING:
     from cleo.io.io import IO
-    from poetry.core.pyproject.toml import PyProjectTOML
     from poetry.poetry import Poetry
 
+WORKERS_ENV_VAR = "POETRY_WORKSPACE_WORKERS"
+VCS_BACKEND_ENV_VAR = "POETRY_WORKSPACE_VCS_BACKEND"
+VCS_BACKENDS = ["git", "native"]
+
+# Below this many projects to parse, the cost of starting worker processes
+# outweighs the time saved by parsing in parallel.
+_MIN_PARALLEL_PROJECTS = 8
+
 
 class Workspace:
     _pyproject: "PyProjectTOML"
-    _poetry: "Poetry"
-    _projects: List["Poetry"]
+    _poetry: Optional["Poetry"]
+    _projects: List[Project]
+    _projects_by_name: Dict[str, Project]
     _io: "IO"
     _graph: Optional[DependencyGraph]
+    _diff_results: Dict[str, Dict[str, Any]]
 
-    def __init__(self, pyproject: "PyProjectTOML", io: "IO"):
+    def __init__(self, pyproject: "PyProjectTOML", io: "IO", projects: Optional[List[Project]] = None):
         if not is_workspace_pyproject(pyproject):
             raise WorkspaceError("pyproject.toml file does not contain a 'tool.poetry.workspace' section")
 
         monkeypatch_json_schema()
+        validate_config(pyproject.file.path, pyproject.poetry_config)
 
         self._pyproject = pyproject
-        self._poetry = Factory().create_poetry(pyproject.file.path)
+        self._poetry = None
         self._io = io
         self._graph = None
+        self._diff_results = {}
+
+        if projects is None:
+            projects = discover_projects(pyproject, io)
+        self._projects = projects
+        self._projects_by_name = {project.name: project for project in projects}
 
-        self._projects = self._find_projects(pyproject)
-        self._add_project_dependencies()
+    @property
+    def root_dir(self) -> Path:
+        return self._pyproject.file.path.parent
+
+    @property
+    def file_path(self) -> Path:
+        return self._pyproject.file.path
 
     @property
     def poetry(self) -> "Poetry":
+        # Creating the workspace's Poetry instance is relatively slow, so only do
+        # it for commands that actually use it.
+        if self._poetry is None:
+            self._poetry = Factory().create_poetry(self.file_path)
+            self._add_project_dependencies()
         return self._poetry
 
     @property
-    def projects(self) -> List["Poetry"]:
+    def projects(self) -> List[Project]:
         return self._projects
 
+    @property
+    def lock_path(self) -> Path:
+        return self.root_dir / "poetry.lock"
+
     @property
     def graph(self) -> DependencyGraph:
+        """
+        The dependency graph of the workspace's locked packages. When the graph is
+        loaded from the cache, its packages only carry their name, version and
+        source, not their dependencies or other metadata from the lock file.
+        """
         if self._graph is None:
-            locked_repo = self.poetry.locker.locked_repository(with_dev_reqs=True)
-            self._graph = DependencyGraph(locked_repo, [p.package for p in self.projects])
+            self._graph = self._load_graph()
         return self._graph
 
+    @property
+    def diff_results(self) -> Dict[str, Dict[str, Any]]:
+        """Results computed by `Diff` for this workspace, by reference."""
+        return self._diff_results
+
+    @property
+    def vcs_backend(self) -> str:
+        """The backend used to read the workspace's git repository, see `VCS_BACKENDS`."""
+        value = os.environ.get(VCS_BACKEND_ENV_VAR)
+        source = VCS_BACKEND_ENV_VAR
+        if value is None:
+            value = self._pyproject.data["tool"]["poetry"]["workspace"].get("vcs-backend", "git")
+            source = "'vcs-backend' in the 'tool.poetry.workspace' section"
+
+        if value not in VCS_BACKENDS:
+            raise WorkspaceError(f"{source} must be one of {', '.join(VCS_BACKENDS)}, got '{value}'")
+        return value
+
+    def get_project(self, name: str) -> Optional[Project]:
+        return self._projects_by_name.get(canonicalize_name(name))
+
     def find_project(self, name: str) -> Optional["Poetry"]:
-        for project in self.projects:
-            if project.package.name == name:
-                return project
-        return None
+        project = self.get_project(name)
+        if project is None:
+            return None
+        return project.poetry
 
-    def _find_projects(self, pyproject: "PyProjectTOML") -> List["Poetry"]:
-        content = pyproject.data["tool"]["poetry"]["workspace"]
-        if "include" not in content:
-            raise WorkspaceError("pyproject.toml file requires 'include' in the 'tool.poetry.workspace' section")
+    def _load_graph(self) -> DependencyGraph:
+        # Building the graph requires parsing the lock file and resolving every
+        # locked dependency, so reuse the snapshot saved by a previous run if
+        # neither the lock file nor the workspace projects have changed since.
+        cache = WorkspaceCache(self.root_dir, self._io)
+        key = self._graph_snapshot_key()
+        if key is not None:
+            snapshot = cache.get_graph_snapshot(key)
+            if snapshot is not None:
+                if self._io.is_debug():
+                    self._io.write_line("Using cached dependency graph")
+                return DependencyGraph.from_snapshot(snapshot)
 
-        include = content["include"]
-        exclude = content.get("exclude", [])
+        locker = Locker(self.lock_path, self._pyproject.poetry_config)
+        graph = DependencyGraph(locker.locked_repository(with_dev_reqs=True), [p.package for p in self.projects])
 
-        matches: Set[str] = set()
-        for pattern in include:
-            pattern = str(self.poetry.file.path.parent / pattern / "pyproject.toml")
-            matches = matches.union(set(glob(pattern, recursive=True)))
+        if key is not None:
+            cache.set_graph_snapshot(key, graph.to_snapshot())
+        return graph
 
-        for pattern in exclude:
-            pattern = str(self.poetry.file.path.parent / pattern / "pyproject.toml")
-            matches = matches.difference(set(glob(pattern, recursive=True)))
+    def _graph_snapshot_key(self) -> Optional[str]:
+        """
+        Returns a hash of everything the dependency graph is built from. The lock
+        file's own `content-hash` is not used, as it only covers the dependency
+        specifications and is unchanged by e.g. `poetry update`.
+        """
+        try:
+            lock_content = self.lock_path.read_bytes()
+        except OSError:
+            return None
 
-        if self._io.is_debug():
-            self._io.write_line(f"Using workspace {self.poetry.file.path}")
-            self._io.write_line("Found workspace projects:")
-            for path in sorted(matches):
-                self._io.write_line(f"- {path}")
+        projects = [[str(project.file_path), project.config] for project in self.projects]
 
-        return [Factory().create_poetry(Path(path)) for path in sorted(matches)]
+        digest = hashlib.sha256(lock_content)
+        digest.update(json.dumps(projects, sort_keys=True).encode())
+        return digest.hexdigest()
 
     def _add_project_dependencies(self) -> None:
         requires = set(pkg.name for pkg in self.poetry.package.requires)
 
         for project in self.projects:
-            name = project.pyproject.poetry_config["name"]
-            if name in requires:
+            if project.name in requires:
                 continue
 
             # Add workspace project as an editable path dependency.
             self.poetry.package.add_dependency(
                 DirectoryDependency(
-                    name=name,
-                    path=project.file.path.parent,
+                    name=project.pretty_name,
+                    path=project.root_dir,
                     develop=True,
                 )
             )
@@ -113,10 +187,136 @@ def is_workspace_pyproject(pyproject: "PyProjectTOML") -> bool:
     return pyproject.file.exists() and pyproject.data.get("tool", {}).get("poetry", {}).get("workspace") is not None
 
 
+def discover_projects(pyproject: "PyProjectTOML", io: "IO") -> List[Project]:
+    """
+    Finds the projects included in the workspace defined by the given pyproject.toml
+    file. This only requires the projects' parsed configurations, which are cached
+    across runs, so it is much cheaper than creating the workspace's Poetry instance.
+    """
+    content = pyproject.data["tool"]["poetry"]["workspace"]
+    if "include" not in content:
+        raise WorkspaceError("pyproject.toml file requires 'include' in the 'tool.poetry.workspace' section")
+
+    include = content["include"]
+    exclude = content.get("exclude", [])
+    if not isinstance(include, list) or not isinstance(exclude, list):
+        raise WorkspaceError("'include' and 'exclude' in the 'tool.poetry.workspace' section must be lists")
+
+    root_dir = pyproject.file.path.parent
+
+    matches: Set[str] = set()
+    for pattern in include:
+        pattern = str(root_dir / pattern / "pyproject.toml")
+        matches = matches.union(set(glob(pattern, recursive=True)))
+
+    for pattern in exclude:
+        pattern = str(root_dir / pattern / "pyproject.toml")
+        matches = matches.difference(set(glob(pattern, recursive=True)))
+
+    if io.is_debug():
+        io.write_line(f"Using workspace {pyproject.file.path}")
+        io.write_line("Found workspace projects:")
+        for match in sorted(matches):
+            io.write_line(f"- {match}")
+
+    # Parsing and validating each project's pyproject.toml file is slow for
+    # large workspaces, so reuse the configurations cached by previous runs
+    # for files that have not been modified since.
+    cache = WorkspaceCache(root_dir, io)
+    paths = sorted(Path(match) for match in matches)
+    configs: Dict[Path, Dict[str, Any]] = {}
+    missing: List[Path] = []
+    for path in paths:
+        config = cache.get_project_config(path)
+        if config is None:
+            missing.append(path)
+        else:
+            configs[path] = config
+
+    if missing:
+        workers = _get_workers(content)
+        if io.is_debug():
+            io.write_line(f"Parsing {len(missing)} project(s) using {workers} worker(s)")
+
+        for path, config in zip(missing, load_project_configs(missing, workers)):
+            cache.set_project_config(path, config)
+            configs[path] = config
+
+    projects = [Project(path, configs[path]) for path in paths]
+
+    cache.retain_projects([project.file_path for project in projects])
+    cache.save()
+
+    return projects
+
+
+def _get_workers(content: Dict[str, Any]) -> int:
+    value = os.environ.get(WORKERS_ENV_VAR)
+    if value is not None:
+        try:
+            workers = int(value)
+        except ValueError:
+            workers = 0
+        if workers < 1:
+            raise WorkspaceError(f"{WORKERS_ENV_VAR} must be a positive integer, got '{value}'")
+        return workers
+
+    configured = content.get("workers")
+    if configured is None:
+        return os.cpu_count() or 1
+    # The schema isn't checked when projects are discovered before the
+    # workspace is created, so the setting is validated here too.
+    if not isinstance(configured, int) or isinstance(configured, bool) or configured < 1:
+        raise ValueError(
+            f"'workers' in the 'tool.poetry.workspace' section must be a positive integer, got {configured!r}"
+        )
+    return configured
+
+
+def load_project_config(path: Path) -> Dict[str, Any]:
+    """
+    Parses and validates the `tool.poetry` section of a project's pyproject.toml
+    file, returning it as plain JSON serializable data.
+    """
+    # Validation may happen in a worker process that has not been patched yet.
+    monkeypatch_json_schema()
+
+    config = PyProjectTOML(path).poetry_config
+    validate_config(path, config)
+
+    data: Dict[str, Any] = json.loads(json.dumps(config))
+    return data
+
+
+def validate_config(path: Path, config: Dict[str, Any]) -> None:
+    check_result = Factory.validate(config)
+    if check_result["errors"]:
+        message = ""
+        for error in check_result["errors"]:
+            message += f"  - {error}\n"
+        raise RuntimeError(f"The Poetry configuration of {path} is invalid:\n" + message)
+
+
+def load_project_configs(paths: List[Path], workers: int) -> List[Dict[str, Any]]:
+    """
+    Loads the configurations of multiple projects, in the same order as the given
+    paths. Parsing and validation is CPU bound, so large numbers of projects are
+    spread across a pool of processes.
+    """
+    if workers < 2 or len(paths) < _MIN_PARALLEL_PROJECTS:
+        return [load_project_config(path) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        results: Iterator[Dict[str, Any]] = executor.map(
+            load_project_config, paths, chunksize=max(1, len(paths) // (workers * 4))
+        )
+        return list(results)
+
+
 def monkeypatch_json_schema() -> None:
     """
     Monkeypatch Poetry's JSON schema for the pyproject.toml file with our custom
     one that includes the schema for `tool.poetry.workspace` section. See
     schemas/gen_schema.py for details.
     """
-    json.SCHEMA_DIR = os.path.join(os.path.dirname(__file__), "schemas")
+    poetry_json.SCHEMA_DIR = os.path.join(os.path.dirname(__file__), "schemas")
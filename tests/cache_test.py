@@ -0,0 +1,109 @@
+import os
+from pathlib import Path
+
+from cleo.io.null_io import NullIO
+
+from poetry_workspace.cache import CACHE_DIR_NAME, BuildManifest, RunCache, WorkspaceCache
+
+
+def test_project_config_round_trip(temp_dir: Path) -> None:
+    pyproject = temp_dir / "pyproject.toml"
+    pyproject.write_text("[tool.poetry]\n")
+
+    cache = WorkspaceCache(temp_dir, NullIO())
+    assert cache.get_project_config(pyproject) is None
+
+    cache.set_project_config(pyproject, {"name": "a"})
+    assert cache.get_project_config(pyproject) == {"name": "a"}
+    cache.save()
+
+    assert (temp_dir / CACHE_DIR_NAME / ".gitignore").exists()
+    assert WorkspaceCache(temp_dir, NullIO()).get_project_config(pyproject) == {"name": "a"}
+
+
+def test_project_config_invalidated_by_modification(temp_dir: Path) -> None:
+    pyproject = temp_dir / "pyproject.toml"
+    pyproject.write_text("[tool.poetry]\n")
+
+    cache = WorkspaceCache(temp_dir, NullIO())
+    cache.set_project_config(pyproject, {"name": "a"})
+    cache.save()
+
+    stat = pyproject.stat()
+    os.utime(pyproject, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert WorkspaceCache(temp_dir, NullIO()).get_project_config(pyproject) is None
+
+    pyproject.write_text("[tool.poetry]\nname = 'a'\n")
+    assert WorkspaceCache(temp_dir, NullIO()).get_project_config(pyproject) is None
+
+
+def test_retain_projects(temp_dir: Path) -> None:
+    a = temp_dir / "a.toml"
+    b = temp_dir / "b.toml"
+    a.write_text("")
+    b.write_text("")
+
+    cache = WorkspaceCache(temp_dir, NullIO())
+    cache.set_project_config(a, {"name": "a"})
+    cache.set_project_config(b, {"name": "b"})
+    cache.retain_projects([a])
+    cache.save()
+
+    cache = WorkspaceCache(temp_dir, NullIO())
+    assert cache.get_project_config(a) == {"name": "a"}
+    assert cache.get_project_config(b) is None
+
+
+def test_corrupt_cache_file(temp_dir: Path) -> None:
+    (temp_dir / CACHE_DIR_NAME).mkdir()
+    (temp_dir / CACHE_DIR_NAME / "projects.json").write_text("{not json")
+
+    pyproject = temp_dir / "pyproject.toml"
+    pyproject.write_text("")
+    assert WorkspaceCache(temp_dir, NullIO()).get_project_config(pyproject) is None
+
+
+def test_run_cache_round_trip(temp_dir: Path) -> None:
+    cache = RunCache(temp_dir, NullIO())
+    assert cache.get("key") is None
+
+    cache.set("key", 0, ["line 1", "line 2"])
+    entry = RunCache(temp_dir, NullIO()).get("key")
+    assert entry and entry["exit_code"] == 0 and entry["output"] == ["line 1", "line 2"]
+    assert (temp_dir / CACHE_DIR_NAME / ".gitignore").exists()
+
+
+def test_run_cache_prune_evicts_least_recently_used(temp_dir: Path) -> None:
+    cache = RunCache(temp_dir, NullIO(), max_size=0)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.set(key, 0, ["x" * 100])
+        file = cache.path / f"{key}.json"
+        os.utime(file, ns=(0, i * 1_000_000_000))
+    size = (cache.path / "a.json").stat().st_size
+
+    # Reading an entry marks it as recently used.
+    assert cache.get("a")
+
+    RunCache(temp_dir, NullIO(), max_size=size).prune()
+    assert sorted(file.name for file in cache.path.glob("*.json")) == ["a.json"]
+
+
+def test_build_manifest(temp_dir: Path) -> None:
+    pyproject = temp_dir / "liba" / "pyproject.toml"
+    artifact = temp_dir / "liba" / "dist" / "liba-0.1.0.tar.gz"
+    artifact.parent.mkdir(parents=True)
+    artifact.write_text("")
+
+    manifest = BuildManifest(temp_dir, NullIO())
+    assert not manifest.is_up_to_date(pyproject, "hash", "0.1.0")
+
+    manifest.set(pyproject, "hash", "0.1.0", [artifact])
+    manifest.save()
+
+    manifest = BuildManifest(temp_dir, NullIO())
+    assert manifest.is_up_to_date(pyproject, "hash", "0.1.0")
+    assert not manifest.is_up_to_date(pyproject, "other", "0.1.0")
+    assert not manifest.is_up_to_date(pyproject, "hash", "0.2.0")
+
+    artifact.unlink()
+    assert not manifest.is_up_to_date(pyproject, "hash", "0.1.0")
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from cleo.io.buffered_io import BufferedIO
+from cleo.io.null_io import NullIO
+from poetry.core.packages.directory_dependency import DirectoryDependency
+from poetry.core.pyproject.toml import PyProjectTOML
+from poetry.factory import Factory
+
+from poetry_workspace.commands.build import PathDependencyVersions, pin_path_dependencies
+from poetry_workspace.workspace import Workspace
+from tests.conftest import EXAMPLE_WORKSPACE_PYPROJECT_PATH
+
+
+def test_path_dependency_versions_from_workspace(copied_example_workspace: Path) -> None:
+    root = copied_example_workspace
+    workspace = Workspace(PyProjectTOML(root / "pyproject.toml"), NullIO())
+    project = workspace.get_project("libb")
+    assert project is not None
+    libb = project.package
+
+    # The version is taken from the workspace's loaded configuration, so later
+    # changes to the file aren't seen.
+    pyproject = root / "projects" / "liba" / "pyproject.toml"
+    pyproject.write_text(pyproject.read_text().replace('version = "0.1.0"', 'version = "0.2.0"'))
+    assert PathDependencyVersions(NullIO(), workspace).resolve(libb) == {"liba": "0.1.0"}
+    assert PathDependencyVersions(NullIO()).resolve(libb) == {"liba": "0.2.0"}
+
+
+def test_path_dependency_versions_reads_each_project_once(copied_example_workspace: Path) -> None:
+    root = copied_example_workspace
+    libb = Factory().create_poetry(root / "projects" / "libb" / "pyproject.toml").package
+
+    versions = PathDependencyVersions(NullIO())
+    assert versions.resolve(libb) == {"liba": "0.1.0"}
+
+    pyproject = root / "projects" / "liba" / "pyproject.toml"
+    pyproject.write_text(pyproject.read_text().replace('version = "0.1.0"', 'version = "0.2.0"'))
+    assert versions.resolve(libb) == {"liba": "0.1.0"}
+
+
+def test_path_dependency_versions_non_poetry_project(temp_dir: Path) -> None:
+    (temp_dir / "lib").mkdir()
+    (temp_dir / "lib" / "setup.py").write_text("")
+
+    io = BufferedIO()
+    dep = DirectoryDependency("lib", temp_dir / "lib")
+    assert PathDependencyVersions(io).get(dep) == "*"
+    assert "Not a Poetry project" in io.fetch_output()
+
+
+def test_pin_path_dependencies() -> None:
+    poetry = Factory().create_poetry(EXAMPLE_WORKSPACE_PYPROJECT_PATH.parent / "projects" / "libb" / "pyproject.toml")
+    package = poetry.package
+
+    pin_path_dependencies(package, {"liba": "0.3.0"})
+
+    liba = next(dep for dep in package.requires if dep.name == "liba")
+    assert not isinstance(liba, DirectoryDependency)
+    assert liba.pretty_constraint == "0.3.0"
@@ -0,0 +1,79 @@
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from cleo.io.outputs.output import Verbosity
+from poetry.utils.env import EnvManager
+
+from poetry_workspace.commands.workspace.build import build_in_parallel, build_project
+
+
+def test_build_project(copy_example_project: Callable[[str], Path]) -> None:
+    root = copy_example_project("liba")
+
+    exit_code, output, built = build_project(
+        root / "pyproject.toml", EnvManager.get_system_env(), "wheel", Verbosity.NORMAL
+    )
+
+    assert exit_code == 0
+    assert "Building <c1>liba</c1>" in output
+    assert built == [root / "dist" / "liba-0.1.0-py3-none-any.whl"]
+    assert built[0].exists()
+
+    # Artifacts that weren't rebuilt aren't reported.
+    (root / "dist" / "other.whl").write_text("")
+    _, _, built = build_project(root / "pyproject.toml", EnvManager.get_system_env(), "wheel", Verbosity.NORMAL)
+    assert built == [root / "dist" / "liba-0.1.0-py3-none-any.whl"]
+
+
+def test_workspace_build_jobs_reports_failure(create_fixture_workspace: Callable[[str], Path]) -> None:
+    root = create_fixture_workspace("list/basic")
+    # liba can't be built, as the package it includes doesn't exist.
+    shutil.rmtree(root / "projects" / "liba" / "liba")
+
+    proc = subprocess.run(
+        ["poetry", "workspace", "build", "--jobs", "1", "--format", "wheel"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    output = proc.stdout.decode() + proc.stderr.decode()
+    assert proc.returncode != 0
+    assert "No file/folder found for package liba" in output
+    assert "1 of 2 projects failed to build: liba" in output
+
+
+def fake_build(fail: bool) -> Tuple[int, str, List[Path]]:
+    if fail:
+        return 1, "failed", []
+    time.sleep(0.05)
+    return 0, "built", []
+
+
+def test_build_in_parallel_cancels_after_failure() -> None:
+    builds = [(True,)] + [(False,)] * 20
+    results = list(build_in_parallel(1, fake_build, builds))
+
+    assert results[0] == (0, (1, "failed", []))
+    assert all(result == (0, "built", []) for _, result in results[1:])
+    assert len(results) < len(builds)
+
+
+def test_build_in_parallel_reports_invalid_pyproject(
+    temp_dir: Path, copy_example_project: Callable[[str], Path]
+) -> None:
+    broken = temp_dir / "broken" / "pyproject.toml"
+    broken.parent.mkdir()
+    broken.write_text('[tool.poetry]\nname = "broken"\n')
+    liba = copy_example_project("liba")
+
+    env = EnvManager.get_system_env()
+    builds = [(broken, env, "wheel", Verbosity.NORMAL), (liba / "pyproject.toml", env, "wheel", Verbosity.NORMAL)]
+    results = dict(build_in_parallel(1, build_project, builds))
+
+    exit_code, output, built = results[0]
+    assert exit_code == 1
+    assert "RuntimeError: The Poetry configuration is invalid" in output
+    assert built == []
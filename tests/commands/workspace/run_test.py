@@ -0,0 +1,54 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, List
+
+from poetry_workspace.commands.workspace.run import MAX_LINE_LENGTH, stream_process
+
+
+def test_stream_process() -> None:
+    script = (
+        "import sys; print('out 1', flush=True); print('err', file=sys.stderr, flush=True); print('out 2'); sys.exit(3)"
+    )
+    proc: "subprocess.Popen[str]" = subprocess.Popen(
+        [sys.executable, "-c", script],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+    )
+
+    lines: List[str] = []
+    assert stream_process(proc, lines.append) == 3
+    assert sorted(lines) == ["err", "out 1", "out 2"]
+    assert lines.index("out 1") < lines.index("out 2")
+
+
+def test_stream_process_splits_long_lines() -> None:
+    script = f"print('x' * {MAX_LINE_LENGTH * 2 + 1})"
+    proc: "subprocess.Popen[str]" = subprocess.Popen(
+        [sys.executable, "-c", script],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+    )
+
+    lines: List[str] = []
+    assert stream_process(proc, lines.append) == 0
+    assert [len(line) for line in lines] == [MAX_LINE_LENGTH, MAX_LINE_LENGTH, 1]
+
+
+def test_workspace_run_fail_fast_cancels_running_commands(create_fixture_workspace: Callable[[str], Path]) -> None:
+    create_fixture_workspace("list/basic")
+    script = "import os, sys, time; sys.exit(1) if os.path.basename(os.getcwd()) == 'liba' else time.sleep(30)"
+
+    proc = subprocess.run(
+        ["poetry", "workspace", "run", "--parallel", "--fail-fast", "--", "python", "-c", script],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=20,
+    )
+
+    output = proc.stdout.decode()
+    assert proc.returncode == 1
+    assert "liba: exit code 1" in output
+    assert "Cancelled 1 projects: libb" in output
@@ -20,8 +20,8 @@ EXAMPLE_WORKSPACE_PYPROJECT_PATH = Path(__file__).parent.parent / "example" / "p
 
 
 @pytest.fixture()
-def example_workspace() -> Workspace:
-    pyproject = PyProjectTOML(EXAMPLE_WORKSPACE_PYPROJECT_PATH)
+def example_workspace(copied_example_workspace: Path) -> Workspace:
+    pyproject = PyProjectTOML(copied_example_workspace / "pyproject.toml")
     return Workspace(pyproject, NullIO())
 
 
@@ -36,9 +36,31 @@ def temp_dir() -> Generator[Path, None, None]:
 
 
 @pytest.fixture()
-def git(temp_dir: Path) -> Git:
+def copied_example_workspace(temp_dir: Path) -> Path:
+    """Returns the root of a copy of the example workspace, which tests are free to modify."""
+    root = temp_dir / "example"
+    shutil.copytree(EXAMPLE_WORKSPACE_PYPROJECT_PATH.parent, root, ignore=shutil.ignore_patterns(".*", "__pycache__"))
+    return root
+
+
+@pytest.fixture()
+def copy_example_project(temp_dir: Path) -> Callable[[str], Path]:
+    """Returns a function that copies one of the example workspace's projects on its own, returning its root."""
+
+    def copy(name: str) -> Path:
+        root = temp_dir / name
+        shutil.copytree(EXAMPLE_WORKSPACE_PYPROJECT_PATH.parent / "projects" / name, root)
+        return root
+
+    return copy
+
+
+@pytest.fixture()
+def git(temp_dir: Path) -> Generator[Git, None, None]:
     run("git", "init")
-    return Git(temp_dir, NullIO())
+    git = Git(temp_dir, NullIO())
+    yield git
+    git.close()
 
 
 def build_repo(deps: Dict[str, List[str]]) -> Repository:
@@ -5,10 +5,10 @@ from cleo.io.null_io import NullIO
 from poetry.core.packages.package import Package
 from poetry.core.pyproject.toml import PyProjectTOML
 
-from poetry_workspace.diff import Diff
+from poetry_workspace.diff import Diff, LockDiff, ProjectTrie, locked_packages
 from poetry_workspace.vcs.git import Git
 from poetry_workspace.workspace import Workspace
-from tests.conftest import assert_packages, sync_dir
+from tests.conftest import assert_packages, run, sync_dir
 from tests.vcs import git_util
 
 
@@ -41,6 +41,71 @@ def test_get_changed_external(diff: Diff, commit_1: str) -> None:
     assert_packages(diff.get_changed_external(commit_1), ["pytz"])
 
 
+def test_get_lock_diff(diff: Diff, commit_1: str) -> None:
+    lock_diff = diff.get_lock_diff(commit_1)
+    assert lock_diff.added == ["libc"]
+    assert lock_diff.removed == []
+    assert lock_diff.changed == ["pytz"]
+
+
+def test_lock_diff() -> None:
+    old = locked_packages(
+        """
+[[package]]
+name = "a"
+version = "1.0"
+
+[[package]]
+name = "b"
+version = "1.0"
+
+[[package]]
+name = "c"
+version = "1.0"
+
+[[package]]
+name = "d"
+version = "1.0"
+
+[metadata.files]
+a = [{file = "a-1.0.tar.gz", hash = "sha256:aaa"}]
+b = [{file = "b-1.0.tar.gz", hash = "sha256:bbb"}]
+"""
+    )
+    new = locked_packages(
+        """
+[[package]]
+name = "A"
+version = "1.0"
+files = [{file = "a-1.0.tar.gz", hash = "sha256:aaa"}]
+
+[[package]]
+name = "b"
+version = "1.0"
+files = [{file = "b-1.0.tar.gz", hash = "sha256:changed"}]
+
+[[package]]
+name = "c"
+version = "1.0"
+
+[package.source]
+type = "git"
+url = "https://github.com/example/c.git"
+reference = "main"
+resolved_reference = "abc"
+
+[[package]]
+name = "e"
+version = "1.0"
+"""
+    )
+
+    lock_diff = LockDiff(old, new)
+    assert lock_diff.added == ["e"]
+    assert lock_diff.removed == ["d"]
+    assert lock_diff.changed == ["b", "c"]
+
+
 def test_get_changed_files(git: Git, diff: Diff, commit_1: str) -> None:
     changed_files_paths = diff.get_changed_files(commit_1)
     assert [str(path.relative_to(git.root)) for path in changed_files_paths] == [
@@ -56,3 +121,88 @@ def test_get_old_graph(diff: Diff, commit_1: str) -> None:
     graph = diff.get_old_graph(commit_1)
     assert graph.has_package(Package("pytz", "2020.1"))
     assert not graph.has_package(Package("pytz", "2020.5"))
+
+
+def test_project_trie() -> None:
+    liba = Package("liba", "0.1.0")
+    nested = Package("nested", "0.1.0")
+    libb = Package("libb", "0.1.0")
+
+    trie = ProjectTrie()
+    trie.add(Path("/repo/projects/liba"), liba)
+    trie.add(Path("/repo/projects/liba/vendor/nested"), nested)
+    trie.add(Path("/repo/projects/libb"), libb)
+
+    assert trie.find(Path("/repo/projects/liba/liba/__init__.py")) == liba
+    assert trie.find(Path("/repo/projects/liba")) == liba
+    assert trie.find(Path("/repo/projects/liba/vendor/nested/pyproject.toml")) == nested
+    assert trie.find(Path("/repo/projects/liba/vendor/other.py")) == liba
+    assert trie.find(Path("/repo/projects/libb/pyproject.toml")) == libb
+    assert trie.find(Path("/repo/projects/libbb/pyproject.toml")) is None
+    assert trie.find(Path("/repo/pyproject.toml")) is None
+
+
+def test_results_are_memoised(git: Git, diff: Diff, commit_1: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    changed = diff.get_changed_projects(commit_1)
+    changed.append(Package("other", "0.1.0"))
+    external = diff.get_changed_external(commit_1)
+
+    def fail(*args):
+        raise AssertionError("VCS should not be used again")
+
+    monkeypatch.setattr(git, "iter_changed_files", fail)
+    monkeypatch.setattr(git, "read_files", fail)
+
+    other = Diff(workspace=diff._workspace, vcs=git)
+    assert_packages(other.get_changed_projects(commit_1), ["libb", "libc"])
+    assert other.get_changed_external(commit_1) == external
+
+
+def test_close_only_closes_detected_vcs(git: Git, diff: Diff, monkeypatch: pytest.MonkeyPatch) -> None:
+    closed = []
+    monkeypatch.setattr(git, "close", lambda: closed.append(git))
+    monkeypatch.setattr("poetry_workspace.diff.detect_vcs", lambda io, backend: git)
+
+    diff.close()
+    assert closed == []
+
+    Diff(workspace=diff._workspace).close()
+    assert closed == [git]
+
+
+def test_changes_since_merge_base(git: Git, diff: Diff, commit_1: str, commit_2: str) -> None:
+    # Diverge from commit_1 on another branch, which changes liba.
+    run("git", "checkout", "-q", "-b", "other", commit_1)
+    (git.root / "projects" / "liba" / "liba" / "__init__.py").write_text("changed = True\n")
+    git_util.commit()
+    run("git", "checkout", "-q", commit_2)
+
+    assert diff.get_commit_range("other...HEAD") == (commit_1, commit_2)
+    assert diff.get_commit_range("other") is None
+    assert_packages(diff.get_changed_projects("other...HEAD"), ["libb", "libc"])
+    assert_packages(diff.get_changed_projects("other"), ["liba", "libb", "libc"])
+    assert_packages(diff.get_changed_external("other...HEAD"), ["pytz"])
+
+
+def test_changes_since_merge_base_are_cached(
+    git: Git, commit_1: str, commit_2: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def diff() -> Diff:
+        return Diff(workspace=Workspace(PyProjectTOML(git.root / "pyproject.toml"), NullIO()), vcs=git)
+
+    assert [str(path.relative_to(git.root)) for path in diff().get_changed_files(f"{commit_1}...")] == [
+        "poetry.lock",
+        "projects/libb/libb/__init__.py",
+        "projects/libb/pyproject.toml",
+        "projects/libc/libc/__init__.py",
+        "projects/libc/pyproject.toml",
+    ]
+    assert_packages(diff().get_changed_projects(f"{commit_1}..."), ["libb", "libc"])
+
+    def fail(*args):
+        raise AssertionError("changes should be cached")
+
+    monkeypatch.setattr(git, "get_changed_files", fail)
+    monkeypatch.setattr(git, "iter_changed_files", fail)
+    assert len(diff().get_changed_files(f"{commit_1}...{commit_2}")) == 5
+    assert_packages(diff().get_changed_projects(f"{commit_1}...{commit_2}"), ["libb", "libc"])
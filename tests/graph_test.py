@@ -1,4 +1,7 @@
+import json
+
 import pytest
+from poetry.core.packages.dependency import Dependency
 from poetry.core.packages.package import Package
 
 from poetry_workspace.errors import GraphError
@@ -53,6 +56,19 @@ def test_find_package(graph: DependencyGraph) -> None:
         assert graph.find_package("z") is None
 
 
+def test_find_package_exact_name() -> None:
+    repo = build_repo({"external/ext": [], "external/ext-extra": ["ext"], "internal/my_lib": ["ext-extra"]})
+    projects = [package for package in repo.packages if package.source_url == "internal"]
+    graph = DependencyGraph(repo, projects)
+
+    assert graph.find_package("ext").name == "ext"
+    assert graph.find_package("ext-extra").name == "ext-extra"
+    assert graph.find_package("My_Lib").name == "my-lib"
+
+    with pytest.raises(GraphError):
+        graph.find_package("ex")
+
+
 def test_is_project_package(graph: DependencyGraph) -> None:
     def is_project_package(name: str) -> bool:
         package = graph.find_package(name)
@@ -76,6 +92,11 @@ def test_reverse_dependencies(graph: DependencyGraph) -> None:
     assert_packages(graph.reverse_dependencies("c"), [])
 
 
+def test_dependencies_among(graph: DependencyGraph) -> None:
+    assert graph.dependencies_among(["a", "c"]) == {"a": [], "c": ["a"]}
+    assert graph.dependencies_among(["ext", "b", "c"]) == {"ext": [], "b": ["ext"], "c": ["ext", "b"]}
+
+
 def test_search(graph: DependencyGraph) -> None:
     assert_packages(graph.search(), ["a", "b", "c"])
     assert_packages(graph.search(include_external=True), ["ext", "a", "b", "c"])
@@ -91,3 +112,104 @@ def test_search(graph: DependencyGraph) -> None:
         ),
         ["ext", "a", "b", "c"],
     )
+
+
+def test_snapshot(graph: DependencyGraph) -> None:
+    snapshot = json.loads(json.dumps(graph.to_snapshot()))
+    restored = DependencyGraph.from_snapshot(snapshot)
+
+    assert_packages(list(restored), ["ext", "a", "b", "c"])
+    assert restored.find_package("a").source_url == "internal"
+    assert restored.is_project_package(restored.find_package("a"))
+    assert not restored.is_project_package(restored.find_package("ext"))
+    assert restored.has_package(Package("ext", "1.0"))
+    assert_packages(restored.dependencies("b"), ["a"])
+    assert_packages(restored.reverse_dependencies("b"), ["c"])
+    assert_packages(restored.search(package_names=["b"], include_dependencies=True), ["a", "b"])
+
+
+def test_multiple_package_versions() -> None:
+    repo = build_repo({"external/ext": [], "internal/a": []})
+    repo.add_package(Package("ext", "2.0", source_url="external"))
+    a = repo.find_packages(Dependency("a", "*"))[0]
+    a.add_dependency(Dependency("ext", ">=2"))
+
+    graph = DependencyGraph(repo, [a])
+    assert [dep.version.text for dep in graph.dependencies("a")] == ["2.0"]
+
+
+def test_long_chain() -> None:
+    size = 10_000
+    repo = build_repo({f"p{i}": [f"p{i + 1}"] if i < size - 1 else [] for i in range(size)})
+    graph = DependencyGraph(repo, repo.packages)
+
+    assert [package.name for package in graph] == [f"p{i}" for i in reversed(range(size))]
+    assert len(graph.search(package_names=["p0"], include_dependencies=True)) == size
+    assert len(graph.search(package_names=[f"p{size - 1}"], include_reverse_dependencies=True)) == size
+
+
+def test_dense_diamonds() -> None:
+    # Every package depends on every package in the next layer, so the number
+    # of paths from the root grows exponentially with the number of layers.
+    layers, width = 30, 8
+    deps = {"root": [f"l0-{i}" for i in range(width)]}
+    for layer in range(layers):
+        for i in range(width):
+            deps[f"l{layer}-{i}"] = [f"l{layer + 1}-{j}" for j in range(width)] if layer < layers - 1 else []
+
+    repo = build_repo(deps)
+    graph = DependencyGraph(repo, [])
+    assert graph.level("root") == -1
+    assert graph.level(f"l{layers - 1}-0") == -(layers + 1)
+
+
+def test_level_is_longest_path() -> None:
+    repo = build_repo({"a": ["b", "d"], "b": ["c"], "c": ["d"], "d": []})
+    graph = DependencyGraph(repo, [])
+    assert [graph.level(name) for name in "abcd"] == [-1, -2, -3, -4]
+
+
+def test_cycle() -> None:
+    repo = build_repo({"root": ["a", "b"], "a": ["b"], "b": ["c"], "c": ["a"]})
+    with pytest.raises(
+        GraphError, match="Dependency cycle detected: (a -> b -> c -> a|b -> c -> a -> b|c -> a -> b -> c)"
+    ):
+        DependencyGraph(repo, [])
+
+    repo = build_repo({"a": ["a"]})
+    with pytest.raises(GraphError, match="a -> a"):
+        DependencyGraph(repo, [])
+
+
+def test_search_with_reachability_index() -> None:
+    repo = build_repo(
+        {
+            "external/ext1": [],
+            "external/ext2": ["ext1"],
+            "internal/a": ["ext1"],
+            "internal/b": ["a", "ext2"],
+            "internal/c": ["b"],
+            "internal/d": ["a"],
+            "internal/e": [],
+        }
+    )
+    projects = [package for package in repo.packages if package.source_url == "internal"]
+    graph = DependencyGraph(repo, projects)
+
+    names = ["a", "b", "d", "e"]
+    for include_dependencies in (False, True):
+        for include_reverse_dependencies in (False, True):
+            for include_external in (False, True):
+                kwargs = dict(
+                    include_dependencies=include_dependencies,
+                    include_reverse_dependencies=include_reverse_dependencies,
+                    include_external=include_external,
+                )
+                # Searching one package at a time doesn't use the index.
+                expected = {package.name for name in names for package in graph.search(package_names=[name], **kwargs)}
+                results = graph.search(package_names=names, **kwargs)
+                assert {package.name for package in results} == expected
+                assert results == [package for package in graph if package in results]
+
+    assert graph.index.contains([graph._find_id("a")])
+    assert not graph.index.contains([graph._find_id("ext1")])
@@ -0,0 +1,93 @@
+from pathlib import Path
+
+from cleo.io.null_io import NullIO
+from poetry.core.pyproject.toml import PyProjectTOML
+from poetry.factory import Factory
+
+from poetry_workspace.hashing import ProjectHasher, hash_build_inputs, hash_files, project_files
+from poetry_workspace.workspace import Workspace
+
+
+def test_project_files(temp_dir: Path) -> None:
+    for path in [
+        "pyproject.toml",
+        "pkg/__init__.py",
+        "pkg/__pycache__/a.pyc",
+        ".venv/bin/python",
+        "venv/bin/python",
+        "dist/a.whl",
+    ]:
+        (temp_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        (temp_dir / path).write_text(path)
+
+    assert project_files(temp_dir) == [temp_dir / "pkg" / "__init__.py", temp_dir / "pyproject.toml"]
+
+
+def test_hash_files(temp_dir: Path) -> None:
+    (temp_dir / "a").write_text("a")
+    (temp_dir / "b").write_text("b")
+
+    files = [temp_dir / "a", temp_dir / "b"]
+    original = hash_files(temp_dir, files)
+    assert hash_files(temp_dir, files) == original
+
+    (temp_dir / "b").write_text("ab")
+    assert hash_files(temp_dir, files) != original
+
+    # Moving content between files changes the hash.
+    (temp_dir / "a").write_text("ab")
+    (temp_dir / "b").write_text("b")
+    assert hash_files(temp_dir, files) != original
+
+
+def test_hash_files_broken_symlink(temp_dir: Path) -> None:
+    (temp_dir / "link").symlink_to("missing")
+    original = hash_files(temp_dir, project_files(temp_dir))
+
+    (temp_dir / "link").unlink()
+    (temp_dir / "link").symlink_to("other")
+    assert hash_files(temp_dir, project_files(temp_dir)) != original
+
+
+def test_project_hasher(copied_example_workspace: Path) -> None:
+    root = copied_example_workspace
+
+    def hashes() -> dict:
+        workspace = Workspace(PyProjectTOML(root / "pyproject.toml"), NullIO())
+        hasher = ProjectHasher(workspace)
+        return {name: hasher.hash(name) for name in ["liba", "libb", "libc"]}
+
+    original = hashes()
+    assert hashes() == original
+
+    # Changing a project changes its hash and the hashes of its dependents.
+    (root / "projects" / "libb" / "libb" / "__init__.py").write_text("changed = True\n")
+    changed = hashes()
+    assert changed["liba"] == original["liba"]
+    assert changed["libb"] != original["libb"]
+    assert changed["libc"] != original["libc"]
+
+
+def test_hash_build_inputs(copied_example_workspace: Path) -> None:
+    root = copied_example_workspace
+    liba = root / "projects" / "liba"
+    libb = root / "projects" / "libb"
+
+    def build_hash(project: Path, fmt: str = "all") -> str:
+        return hash_build_inputs(Factory().create_poetry(project / "pyproject.toml"), fmt)
+
+    original = {"liba": build_hash(liba), "libb": build_hash(libb)}
+    assert build_hash(liba, "wheel") != original["liba"]
+
+    # Files that aren't included in the package don't change the hash.
+    (liba / "tests" / "test_new.py").write_text("")
+    assert build_hash(liba) == original["liba"]
+
+    (liba / "liba" / "__init__.py").write_text("changed = True\n")
+    assert build_hash(liba) != original["liba"]
+    assert build_hash(libb) == original["libb"]
+
+    # Changing the version of a path dependency changes the dependent's hash.
+    pyproject = liba / "pyproject.toml"
+    pyproject.write_text(pyproject.read_text().replace('version = "0.1.0"', 'version = "0.2.0"'))
+    assert build_hash(libb) != original["libb"]
@@ -0,0 +1,45 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, cast
+
+from cleo.io.null_io import NullIO
+from poetry.console.commands.cache.clear import CacheClearCommand
+from poetry.console.commands.config import ConfigCommand
+from poetry.console.commands.install import InstallCommand
+from poetry.console.commands.run import RunCommand
+
+from poetry_workspace.commands.workspace.list import WorkspaceListCommand
+from poetry_workspace.plugin import find_workspace, uses_workspace
+
+if TYPE_CHECKING:
+    from poetry.console.application import Application
+
+
+def test_uses_workspace() -> None:
+    assert uses_workspace(RunCommand()) is True
+    assert uses_workspace(InstallCommand()) is True
+    assert uses_workspace(WorkspaceListCommand()) is True
+
+    assert uses_workspace(ConfigCommand()) is False
+    assert uses_workspace(CacheClearCommand()) is False
+
+
+def fake_application(project_file: Path) -> "Application":
+    poetry = SimpleNamespace(file=SimpleNamespace(path=project_file))
+    return cast("Application", SimpleNamespace(poetry=poetry))
+
+
+def test_find_workspace(copied_example_workspace: Path) -> None:
+    example_dir = copied_example_workspace
+
+    workspace = find_workspace(fake_application(example_dir / "pyproject.toml"), NullIO())
+    assert workspace and workspace.file_path == example_dir / "pyproject.toml"
+
+    liba_file = example_dir / "projects" / "liba" / "pyproject.toml"
+    workspace = find_workspace(fake_application(liba_file), NullIO())
+    assert workspace and workspace.file_path == example_dir / "pyproject.toml"
+    assert liba_file in [project.file_path for project in workspace.projects]
+
+    # Excluded from the workspace.
+    experimental_file = example_dir / "projects" / "experimental" / "pyproject.toml"
+    assert find_workspace(fake_application(experimental_file), NullIO()) is None
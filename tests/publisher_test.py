@@ -0,0 +1,165 @@
+import email.parser
+import shutil
+import threading
+from email.message import Message
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+
+import pytest
+from cleo.io.buffered_io import BufferedIO
+from cleo.io.outputs.output import Verbosity
+from poetry.factory import Factory
+from poetry.poetry import Poetry
+from poetry.utils.env import EnvManager
+from requests.adapters import HTTPAdapter
+
+from poetry_workspace.commands.workspace.build import build_project
+from poetry_workspace.errors import PublishError
+from poetry_workspace.publisher import ProjectUploader, WorkspacePublisher
+
+
+class Index(ThreadingMixIn, HTTPServer):
+    """A stand-in for a package index that implements the legacy upload API."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), IndexHandler)
+        self.daemon_threads = True
+        self.uploads: Dict[str, Dict[str, List[str]]] = {}
+        self.failures = 0
+        self.attempts = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/legacy/"
+
+
+class IndexHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: Index
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        message = email.parser.BytesParser().parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+        fields: Dict[str, List[str]] = {}
+        filename: Optional[str] = None
+        for part in message.get_payload():
+            assert isinstance(part, Message)
+            name = part.get_param("name", header="content-disposition")
+            assert isinstance(name, str)
+            if name == "content":
+                filename = part.get_filename()
+            else:
+                fields.setdefault(name, []).append(part.get_payload(decode=True).decode())
+
+        with self.server.lock:
+            self.server.attempts += 1
+            if self.server.failures:
+                self.server.failures -= 1
+                status = 503
+            elif filename is None or filename in self.server.uploads:
+                status = 409 if filename else 400
+            else:
+                self.server.uploads[filename] = fields
+                status = 200
+
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def index() -> Generator[Index, None, None]:
+    server = Index()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def liba(copy_example_project: Callable[[str], Path]) -> Poetry:
+    root = copy_example_project("liba")
+    build_project(root / "pyproject.toml", EnvManager.get_system_env(), None, Verbosity.QUIET)
+    return Factory().create_poetry(root)
+
+
+def publish(index: Index, poetry: Poetry, **kwargs: Any) -> Tuple[Dict[Path, PublishError], str]:
+    io = BufferedIO()
+    publisher = WorkspacePublisher(index.url, "local", jobs=2, backoff=0, **kwargs)
+    try:
+        errors = publisher.publish([(poetry, io)])
+    finally:
+        publisher.close()
+    return errors, io.fetch_output()
+
+
+def test_project_uploader_shares_session(liba: Poetry) -> None:
+    uploader = ProjectUploader(liba, pool_size=4)
+    session = uploader.make_session()
+    assert ProjectUploader(liba, session).make_session() is session
+    adapter = session.get_adapter("https://example.com")
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter._pool_maxsize == 4
+
+
+def test_publish(index: Index, liba: Poetry) -> None:
+    errors, output = publish(index, liba)
+
+    assert errors == {}
+    assert sorted(index.uploads) == ["liba-0.1.0-py3-none-any.whl", "liba-0.1.0.tar.gz"]
+    assert index.uploads["liba-0.1.0.tar.gz"]["filetype"] == ["sdist"]
+    assert "Publishing liba (0.1.0) to local" in output
+    assert " - Uploaded liba-0.1.0-py3-none-any.whl" in output
+
+
+def test_publish_retries_server_errors(index: Index, liba: Poetry) -> None:
+    index.failures = 2
+    errors, _ = publish(index, liba)
+
+    assert errors == {}
+    assert index.attempts == 4
+    assert len(index.uploads) == 2
+
+
+def test_publish_gives_up_after_retries(index: Index, liba: Poetry) -> None:
+    index.failures = 100
+    errors, output = publish(index, liba, retries=1)
+
+    assert len(errors) == 2
+    assert all("HTTP Error 503" in str(error) for error in errors.values())
+    assert index.attempts == 4
+    assert "FAILED" in output
+
+
+def test_publish_existing_files(index: Index, liba: Poetry) -> None:
+    publish(index, liba)
+
+    errors, _ = publish(index, liba)
+    assert [str(error) for error in errors.values()] == ["HTTP Error 409: Conflict"] * 2
+
+    errors, output = publish(index, liba, skip_existing=True)
+    assert errors == {}
+    assert " - Skipped liba-0.1.0.tar.gz, it already exists" in output
+
+
+def test_publish_dry_run(index: Index, liba: Poetry) -> None:
+    errors, output = publish(index, liba, dry_run=True)
+    assert errors == {}
+    assert index.attempts == 0
+    assert " - Would upload liba-0.1.0.tar.gz (dry run)" in output
+    assert "Uploaded" not in output
+
+
+def test_publish_without_artifacts(index: Index, liba: Poetry) -> None:
+    shutil.rmtree(liba.file.parent / "dist")
+    errors, _ = publish(index, liba)
+    assert list(errors) == [liba.file.parent / "dist"]
@@ -0,0 +1,80 @@
+import threading
+import time
+from typing import Dict, List
+
+from poetry_workspace.scheduler import Scheduler
+
+
+def test_run_respects_dependencies() -> None:
+    finished: List[str] = []
+
+    def task(name: str) -> int:
+        time.sleep(0.01)
+        finished.append(name)
+        return 0
+
+    dependencies: Dict[str, List[str]] = {"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"]}
+    results = Scheduler(dependencies, jobs=4).run(task)
+
+    assert results == {"a": 0, "b": 0, "c": 0, "d": 0}
+    assert finished[0] == "a"
+    assert finished[-1] == "d"
+
+
+def test_run_limits_concurrency() -> None:
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def task(name: str) -> int:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return 0
+
+    results = Scheduler({str(i): [] for i in range(10)}, jobs=3).run(task)
+
+    assert len(results) == 10
+    assert max_running == 3
+
+
+def test_run_starts_projects_in_order() -> None:
+    started: List[str] = []
+
+    def task(name: str) -> int:
+        started.append(name)
+        return 0
+
+    Scheduler({"c": [], "a": [], "b": ["c"], "d": []}, jobs=1).run(task)
+    assert started == ["c", "a", "b", "d"]
+
+
+def test_run_ignores_unselected_dependencies() -> None:
+    results = Scheduler({"a": ["unknown"], "b": ["a"]}, jobs=2).run(lambda name: 0)
+    assert results == {"a": 0, "b": 0}
+
+
+def test_run_stops_after_failure() -> None:
+    def task(name: str) -> int:
+        return 1 if name == "b" else 0
+
+    dependencies: Dict[str, List[str]] = {"a": [], "b": ["a"], "c": ["b"], "d": ["a"]}
+    results = Scheduler(dependencies, jobs=1).run(task)
+
+    assert results == {"a": 0, "b": 1}
+
+
+def test_run_keep_going() -> None:
+    def task(name: str) -> int:
+        return 1 if name == "b" else 0
+
+    failures: List[str] = []
+    dependencies: Dict[str, List[str]] = {"a": [], "b": ["a"], "c": ["b"], "d": ["a"]}
+    results = Scheduler(dependencies, jobs=1, keep_going=True).run(task, lambda name, code: failures.append(name))
+
+    assert results == {"a": 0, "b": 1, "d": 0}
+    assert failures == ["b"]
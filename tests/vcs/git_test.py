@@ -4,6 +4,7 @@ import pytest
 
 from poetry_workspace.errors import VCSError
 from poetry_workspace.vcs.git import Git
+from tests.conftest import run
 from tests.vcs import git_util
 
 
@@ -55,6 +56,24 @@ def test_get_changed_files(git: Git, commit_1: str, commit_2: str, commit_3: str
     assert git.get_changed_files(commit_3) == []
 
 
+def test_iter_changed_files(git: Git, commit_1: str) -> None:
+    Path("with space.txt").write_text("")
+    Path("a.txt").write_text("changed")
+    git_util.commit()
+
+    assert list(git.iter_changed_files(commit_1)) == [git.root / "a.txt", git.root / "with space.txt"]
+
+    # Iteration can be stopped early.
+    files = git.iter_changed_files(commit_1)
+    assert next(files) == git.root / "a.txt"
+    files.close()
+
+
+def test_iter_changed_files_unknown_ref(git: Git, commit_1: str) -> None:
+    with pytest.raises(VCSError):
+        list(git.iter_changed_files("unknown_ref"))
+
+
 def test_get_changed_files_unknown_ref(git: Git, commit_1: str) -> None:
     with pytest.raises(VCSError):
         git.get_changed_files("unknown_ref")
@@ -92,3 +111,49 @@ def test_read_file_unknown_file(git: Git, commit_1: str) -> None:
     assert not z_txt.exists()
     with pytest.raises(VCSError):
         git.read_file(commit_1, z_txt)
+
+
+def test_read_files(git: Git, commit_1: str, commit_2: str) -> None:
+    a_txt = Path("a.txt")
+    b_txt = git.root / "b.txt"
+    z_txt = Path("z.txt")
+    assert git.read_files(commit_1, [a_txt, b_txt, z_txt]) == {a_txt: "1", b_txt: None, z_txt: None}
+    assert git.read_files(commit_2, [a_txt, b_txt]) == {a_txt: "2", b_txt: "2"}
+
+
+def test_read_files_directory(git: Git, commit_1: str) -> None:
+    Path("dir").mkdir()
+    Path("dir", "d.txt").write_text("d")
+    commit = git_util.commit()
+    assert git.read_files(commit, [Path("dir"), Path("dir/d.txt")]) == {Path("dir"): None, Path("dir/d.txt"): "d"}
+
+
+def test_read_files_unknown_ref(git: Git, commit_1: str) -> None:
+    with pytest.raises(VCSError):
+        git.read_files("unknown_ref", [Path("a.txt")])
+
+    # The batch process is still usable after an error.
+    assert git.read_files(commit_1, [Path("a.txt")]) == {Path("a.txt"): "1"}
+
+
+def test_read_files_restarts_closed_process(git: Git, commit_1: str) -> None:
+    assert git.read_file(commit_1, Path("a.txt")) == "1"
+    git.close()
+    assert git.read_file(commit_1, Path("a.txt")) == "1"
+
+
+def test_resolve_ref(git: Git, commit_1: str, commit_2: str) -> None:
+    assert git.resolve_ref("HEAD") == commit_2
+    assert git.resolve_ref("HEAD~1") == commit_1
+    with pytest.raises(VCSError):
+        git.resolve_ref("unknown_ref")
+
+
+def test_merge_base(git: Git, commit_1: str, commit_2: str) -> None:
+    run("git", "checkout", "-q", "-b", "other", commit_1)
+    Path("c.txt").write_text("c")
+    other = git_util.commit()
+
+    assert git.merge_base(other, commit_2) == commit_1
+    with pytest.raises(VCSError):
+        git.merge_base("unknown_ref", commit_2)
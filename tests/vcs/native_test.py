@@ -0,0 +1,129 @@
+import os
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from cleo.io.null_io import NullIO
+
+from poetry_workspace.errors import VCSError
+from poetry_workspace.vcs.git import Git
+from poetry_workspace.vcs.native import NativeGit
+from tests.conftest import run
+from tests.vcs import git_util
+
+
+@pytest.fixture()
+def native(git: Git) -> Generator[NativeGit, None, None]:
+    native = NativeGit(git.root, NullIO())
+    yield native
+    native.close()
+
+
+@pytest.fixture()
+def history(git: Git) -> str:
+    for i in range(20):
+        Path("dir", "sub").mkdir(parents=True, exist_ok=True)
+        Path("dir", "sub", "nested.txt").write_text("nested\n" * 100 + str(i))
+        Path("dir", "same.txt").write_text("same")
+        Path("top.txt").write_text(str(i % 3))
+        git_util.commit()
+
+    Path("dir", "sub", "nested.txt").unlink()
+    Path("new.txt").write_text("new")
+    return git_util.commit()
+
+
+def assert_same_changes(git: Git, native: NativeGit, ref: str) -> None:
+    assert native.get_changed_files(ref) == git.get_changed_files(ref)
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_get_changed_files_between_commits(git: Git, native: NativeGit, history: str, packed: bool) -> None:
+    if packed:
+        run("git", "repack", "-adq")
+
+    for ref in ["HEAD~1..HEAD", "HEAD~5..HEAD~1", "HEAD~3...HEAD", "HEAD~1..", "HEAD..HEAD~2"]:
+        assert_same_changes(git, native, ref)
+    assert native.get_changed_files("HEAD~1..HEAD") == [
+        git.root / "dir" / "sub" / "nested.txt",
+        git.root / "new.txt",
+    ]
+
+
+@pytest.mark.parametrize("index_version", ["2", "4"])
+def test_get_changed_files_working_tree(git: Git, native: NativeGit, history: str, index_version: str) -> None:
+    run("git", "update-index", "--index-version", index_version)
+
+    Path("top.txt").write_text("modified")
+    Path("new.txt").unlink()
+    Path("dir", "staged.txt").write_text("staged")
+    run("git", "add", "dir/staged.txt")
+    Path("untracked.txt").write_text("untracked")
+    os.chmod("dir/same.txt", 0o755)
+
+    for ref in ["HEAD", "HEAD~1", "HEAD~10", history]:
+        assert_same_changes(git, native, ref)
+    assert native.get_changed_files("HEAD") == [
+        git.root / "dir" / "same.txt",
+        git.root / "dir" / "staged.txt",
+        git.root / "new.txt",
+        git.root / "top.txt",
+    ]
+
+
+def test_get_changed_files_rewritten_with_same_stat(git: Git, native: NativeGit, history: str) -> None:
+    # Rewritten with the same size and modification time, which is only noticed
+    # from the file's changed ctime.
+    stat = Path("top.txt").stat()
+    Path("top.txt").write_text("x")
+    os.utime("top.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert_same_changes(git, native, "HEAD")
+
+
+def test_get_changed_files_unknown_ref(native: NativeGit, history: str) -> None:
+    with pytest.raises(VCSError):
+        native.get_changed_files("unknown_ref")
+
+
+def test_get_changed_files_falls_back_to_git(git: Git, native: NativeGit, history: str) -> None:
+    run("git", "tag", "v1", "HEAD~2")
+    for ref in ["HEAD@{1}", "HEAD~2:dir", "v1"]:
+        assert_same_changes(git, native, ref)
+
+
+def test_read_files(git: Git, native: NativeGit, history: str) -> None:
+    run("git", "repack", "-adq")
+    files = [Path("top.txt"), git.root / "dir" / "sub" / "nested.txt", Path("dir"), Path("missing.txt")]
+    for ref in ["HEAD", "HEAD~1", "HEAD~7"]:
+        assert native.read_files(ref, files) == git.read_files(ref, files)
+
+    with pytest.raises(VCSError):
+        native.read_files("unknown_ref", files)
+
+
+def test_resolve_ref(git: Git, native: NativeGit, history: str) -> None:
+    run("git", "tag", "-a", "-m", "annotated", "v1", "HEAD~3")
+    run("git", "pack-refs", "--all")
+    run("git", "branch", "feature", "HEAD~4")
+    short = run("git", "rev-parse", "--short=8", "HEAD~2")
+
+    for ref in ["HEAD", "@", "HEAD~3", "HEAD^^", "HEAD^1~2", "v1", "v1^{}", "feature", "refs/heads/feature", short]:
+        assert native.resolve_ref(ref) == git.resolve_ref(ref)
+
+
+def test_merge_base(git: Git, native: NativeGit, history: str) -> None:
+    run("git", "checkout", "-q", "-b", "other", "HEAD~5")
+    Path("other.txt").write_text("other")
+    other = git_util.commit()
+    run("git", "checkout", "-q", "-b", "merged", history)
+    run("git", "merge", "-q", "--no-edit", "other")
+
+    for ref, other_ref in [(other, history), ("merged", other), ("merged", "HEAD~3"), (history, history)]:
+        assert native.merge_base(ref, other_ref) == git.merge_base(ref, other_ref)
+
+    run("git", "checkout", "-q", "--orphan", "unrelated")
+    Path("unrelated.txt").write_text("unrelated")
+    unrelated = git_util.commit()
+    with pytest.raises(VCSError):
+        native.merge_base(unrelated, history)
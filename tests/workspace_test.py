@@ -1,15 +1,16 @@
 import tempfile
 from pathlib import Path
-from typing import Generator
+from typing import Callable, Generator
 
 import pytest
 from cleo.io.null_io import NullIO
 from poetry.core.pyproject.toml import PyProjectTOML
 from poetry.factory import Factory
+from poetry.packages.locker import Locker
 
+from poetry_workspace import workspace as workspace_module
 from poetry_workspace.errors import WorkspaceError
-from poetry_workspace.workspace import Workspace
-from tests.conftest import EXAMPLE_WORKSPACE_PYPROJECT_PATH
+from poetry_workspace.workspace import Workspace, discover_projects, load_project_configs
 
 _PYPROJECT_PATH = Path(__file__).parent.parent / "example" / "pyproject.toml"
 
@@ -89,7 +90,16 @@ def test_normal_pyproject(non_workspace_pyproject: Path) -> None:
 def test_poetry(example_workspace: Workspace) -> None:
     assert example_workspace.poetry
     assert example_workspace.poetry.package.name == "root"
-    assert example_workspace.poetry.file.path == EXAMPLE_WORKSPACE_PYPROJECT_PATH
+    assert example_workspace.poetry.file.path == example_workspace.root_dir / "pyproject.toml"
+
+
+def test_poetry_loads_lazily(example_workspace: Workspace) -> None:
+    assert example_workspace.file_path == example_workspace.root_dir / "pyproject.toml"
+    assert example_workspace._poetry is None
+
+    # Workspace projects are added as dependencies of the root project.
+    requires = [dep.name for dep in example_workspace.poetry.package.requires]
+    assert {"liba", "libb", "libc"}.issubset(requires)
 
 
 def test_projects(example_workspace: Workspace) -> None:
@@ -103,3 +113,119 @@ def test_find_project(example_workspace: Workspace) -> None:
     assert example_workspace.find_project("libc")
     assert example_workspace.find_project("experimental") is None
     assert example_workspace.find_project("unknown") is None
+
+    # Names are matched exactly after canonicalization.
+    assert example_workspace.find_project("LibA")
+    assert example_workspace.find_project("lib") is None
+
+
+def test_find_project_loads_lazily(example_workspace: Workspace) -> None:
+    assert not any(project.is_loaded for project in example_workspace.projects)
+
+    poetry = example_workspace.find_project("libb")
+    assert poetry and poetry.package.name == "libb"
+    assert [project.is_loaded for project in example_workspace.projects] == [False, True, False]
+
+
+def test_projects_cache(create_fixture_workspace: Callable[[str], Path], monkeypatch: pytest.MonkeyPatch) -> None:
+    dir_path = create_fixture_workspace("list/basic")
+    pyproject = PyProjectTOML(dir_path / "pyproject.toml")
+    Workspace(pyproject, NullIO())
+
+    def load_project_config(path: Path) -> dict:
+        raise AssertionError(f"unexpected parse of {path}")
+
+    # Unmodified projects are loaded from the cache without being parsed again.
+    with monkeypatch.context() as m:
+        m.setattr(workspace_module, "load_project_config", load_project_config)
+        workspace = Workspace(pyproject, NullIO())
+        assert [project.name for project in workspace.projects] == ["liba", "libb"]
+
+    # Modified projects are parsed again.
+    liba_pyproject = dir_path / "projects" / "liba" / "pyproject.toml"
+    liba_pyproject.write_text(liba_pyproject.read_text().replace('version = "0.1.0"', 'version = "0.2.0"'))
+    workspace = Workspace(pyproject, NullIO())
+    assert workspace.projects[0].package.version.text == "0.2.0"
+
+
+def test_load_project_configs_in_parallel(temp_dir: Path) -> None:
+    paths = []
+    for i in range(10):
+        path = temp_dir / f"lib{i}" / "pyproject.toml"
+        path.parent.mkdir()
+        path.write_text(
+            f"""
+[tool.poetry]
+name = "lib{i}"
+version = "0.1.0"
+description = ""
+authors = ["Bob <bob@bob.com>"]
+"""
+        )
+        paths.append(path)
+
+    configs = load_project_configs(paths, workers=4)
+    assert [config["name"] for config in configs] == [f"lib{i}" for i in range(10)]
+    assert configs == load_project_configs(paths, workers=1)
+
+
+def test_workers_env_var(create_fixture_workspace: Callable[[str], Path], monkeypatch: pytest.MonkeyPatch) -> None:
+    dir_path = create_fixture_workspace("list/basic")
+    monkeypatch.setenv("POETRY_WORKSPACE_WORKERS", "none")
+    with pytest.raises(WorkspaceError):
+        Workspace(PyProjectTOML(dir_path / "pyproject.toml"), NullIO())
+
+
+@pytest.mark.parametrize("workers", ["0", "-1", '"4"', "true"])
+def test_workers_config(create_fixture_workspace: Callable[[str], Path], workers: str) -> None:
+    dir_path = create_fixture_workspace("list/basic")
+    pyproject_path = dir_path / "pyproject.toml"
+    content = pyproject_path.read_text()
+    pyproject_path.write_text(
+        content.replace('include = ["projects/*"]', f'include = ["projects/*"]\nworkers = {workers}')
+    )
+    with pytest.raises(ValueError, match="'workers'"):
+        discover_projects(PyProjectTOML(pyproject_path), NullIO())
+
+
+def test_vcs_backend(create_fixture_workspace: Callable[[str], Path], monkeypatch: pytest.MonkeyPatch) -> None:
+    dir_path = create_fixture_workspace("list/basic")
+    workspace = Workspace(PyProjectTOML(dir_path / "pyproject.toml"), NullIO())
+    assert workspace.vcs_backend == "git"
+
+    monkeypatch.setenv("POETRY_WORKSPACE_VCS_BACKEND", "native")
+    assert workspace.vcs_backend == "native"
+
+    monkeypatch.setenv("POETRY_WORKSPACE_VCS_BACKEND", "svn")
+    with pytest.raises(WorkspaceError):
+        workspace.vcs_backend
+
+    # The configured value is validated too, not only the environment variable.
+    monkeypatch.delenv("POETRY_WORKSPACE_VCS_BACKEND")
+    workspace._pyproject.data["tool"]["poetry"]["workspace"]["vcs-backend"] = "svn"
+    with pytest.raises(WorkspaceError, match="vcs-backend"):
+        workspace.vcs_backend
+
+
+def test_graph_cache(create_fixture_workspace: Callable[[str], Path], monkeypatch: pytest.MonkeyPatch) -> None:
+    dir_path = create_fixture_workspace("list/basic")
+    pyproject = PyProjectTOML(dir_path / "pyproject.toml")
+    graph = Workspace(pyproject, NullIO()).graph
+
+    def locked_repository(*args, **kwargs):
+        raise AssertionError("unexpected lock file parse")
+
+    # An unchanged lock file is not parsed again.
+    with monkeypatch.context() as m:
+        m.setattr(Locker, "locked_repository", locked_repository)
+        cached_graph = Workspace(pyproject, NullIO()).graph
+        assert [package.name for package in cached_graph] == [package.name for package in graph]
+        assert [package.name for package in cached_graph.search()] == ["liba", "libb"]
+
+    # A changed lock file is parsed again.
+    lock_path = dir_path / "poetry.lock"
+    lock_path.write_text(lock_path.read_text() + "\n")
+    with monkeypatch.context() as m:
+        m.setattr(Locker, "locked_repository", locked_repository)
+        with pytest.raises(AssertionError):
+            Workspace(pyproject, NullIO()).graph